@@ -0,0 +1,83 @@
+"""Micro-benchmark: email extraction throughput (MB/s) of email_extractor
+against the previous three-regex find_email.
+
+Usage: python benchmark_extraction.py [corpus_dir]
+Without a directory a synthetic corpus of company pages is generated.
+"""
+import os
+import random
+import re
+import sys
+import time
+from email_extractor import extract_emails
+
+def legacy_find_email(text):
+    # find_email as it was before email_extractor, kept as the baseline
+    email_patterns = [
+        r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}',
+        r'(?:mailto:)?([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})',
+        r'[A-Za-z0-9._%+-]+\s*[\[\(]at\[\)\]][A-Za-z0-9.-]+\.[A-Z|a-z]{2,}',
+    ]
+    found_emails = []
+    for pattern in email_patterns:
+        found_emails.extend(re.findall(pattern, text, re.IGNORECASE))
+    valid_emails = []
+    for email in found_emails:
+        email = email.strip().lower()
+        if '@' in email and '.' in email.split('@')[1]:
+            if not any(spam in email for spam in ['example.com', 'test.com']):
+                valid_emails.append(email)
+    return valid_emails[0] if valid_emails else None
+
+def generate_corpus(pages=200, seed=42):
+    rng = random.Random(seed)
+    words = ['kontakt', 'impressum', 'über', 'uns', 'gmbh', 'services', 'software', 'team',
+             'datenschutz', 'karriere', 'solutions', 'lorem', 'ipsum', 'dolor', 'sit', 'amet']
+    corpus = []
+    for i in range(pages):
+        body = ' '.join(rng.choice(words) for _ in range(rng.randint(2000, 40000)))
+        domain = f"firma{i}.de"
+        style = i % 3
+        if style == 0:
+            address = f"info@{domain}"
+        elif style == 1:
+            address = f"jobs [at] firma{i} (dot) de"
+        else:
+            address = f"mailto:kontakt@{domain}"
+        cut = rng.randint(0, len(body))
+        corpus.append(body[:cut] + f" {address} " + body[cut:])
+    return corpus
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                corpus.append(f.read())
+    return corpus
+
+def measure(name, func, corpus, megabytes, repeat=3):
+    best = float('inf')
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = sum(1 for text in corpus if func(text))
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<28} {megabytes / best:8.1f} MB/s   pages with a hit: {found}/{len(corpus)}")
+    return megabytes / best
+
+def main():
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else generate_corpus()
+    megabytes = sum(len(text.encode('utf-8')) for text in corpus) / (1024 * 1024)
+    print(f"Corpus: {len(corpus)} pages, {megabytes:.1f} MB")
+
+    baseline = measure('legacy find_email', legacy_find_email, corpus, megabytes)
+    single = measure('email_extractor (string)', extract_emails, corpus, megabytes)
+    chunked = measure('email_extractor (chunked)',
+                      lambda text: extract_emails(text[i:i + 4096] for i in range(0, len(text), 4096)),
+                      corpus, megabytes)
+    print(f"Speedup: {single / baseline:.2f}x (string), {chunked / baseline:.2f}x (chunked)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""End-to-end benchmark of the email_scraper pipeline, fully offline.
+
+A local HTTP server poses as the web (it is installed as the HTTP proxy, so
+every company domain resolves to it) and serves a generated corpus of company
+sites: impressum and contact pages, obfuscated addresses, huge pages, slow
+responders and sites without any address. A corpus-backed search backend
+stands in for Google. Reports companies/minute, p50/p95 latency per company,
+peak memory and extraction accuracy, and compares them against a saved
+baseline.
+
+Usage: python benchmark_pipeline.py [--companies N] [--workers N] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+try:
+    import resource  # Unix only; peak memory is not reported on Windows
+except ImportError:
+    resource = None
+
+BASELINE_FILE = 'benchmark_baseline.json'
+TARGET_COUNTRY = 'Almanya'
+SITE_KINDS = ['impressum', 'contact', 'obfuscated', 'huge', 'slow', 'none']
+HUGE_PAGE_BYTES = 3 * 1024 * 1024
+SLOW_SECONDS = 5.0
+SEARCH_LATENCY = 0.2  # Seconds per query, roughly a cached search API
+DIRECTORY_HOST = 'firmen-verzeichnis.test'
+AGENCY_EMAIL = 'info@webagentur-muster.de'  # Decoy on every impressum
+# Third-party addresses on a company's own impressum/contact page that must never be accepted
+DECOY_CASES = [
+    ('Isar Optik GmbH', AGENCY_EMAIL, 'https://isar-optik-gruppe.eu/impressum'),
+    ('Nordtechnik GmbH', 'kontakt@agentur-x.de', 'https://nordtechnik.de/kontakt'),
+]
+
+FIRST_WORDS = ['Nord', 'Rhein', 'Alpen', 'Elbe', 'Berg', 'Wald', 'Hansa', 'Isar', 'Main', 'Weser',
+               'Stern', 'Falke', 'Ostsee', 'Harz', 'Donau']
+SECOND_WORDS = ['Logistik', 'Technik', 'Bau', 'Software', 'Metall', 'Energie', 'Medien', 'Consult',
+                'Design', 'Handel', 'Optik', 'Antriebe']
+FILLER = ('Wir sind Ihr Partner für Qualität und Service. Seit vielen Jahren liefern wir Lösungen '
+          'für Industrie und Handel in ganz Europa. ')
+
+class Site:
+    def __init__(self, company, domain, kind, email):
+        self.company = company
+        self.domain = domain
+        self.kind = kind
+        self.email = email  # Expected answer, None when the site has no address
+        self.pages = {}
+
+def build_site(company, domain, kind, index):
+    email = None if kind == 'none' else f"info@{domain}"
+    site = Site(company, domain, kind, email)
+    home = FILLER * 5
+    if kind == 'huge':
+        home = FILLER * (HUGE_PAGE_BYTES // len(FILLER))
+    site.pages['/'] = (f'<html><head><title>{company}</title></head><body><h1>{company}</h1><p>{home}</p>'
+                       f'<a href="/impressum">Impressum</a> <a href="/kontakt">Kontakt</a></body></html>')
+
+    if kind in ('impressum', 'huge', 'slow'):
+        address = f'E-Mail: <a href="mailto:{email}">{email}</a>'
+    elif kind == 'obfuscated':
+        label, tld = domain.rsplit('.', 1)
+        address = f'E-Mail: info [at] {label} (dot) {tld}'
+    else:
+        address = 'Kontakt: siehe <a href="/kontakt">Kontaktseite</a>'
+    site.pages['/impressum'] = (
+        f'<html><body><h2>Impressum</h2><p>{company}<br>Musterstraße {index}<br>12345 Musterstadt</p>'
+        f'<p>{address}</p><p>Webdesign: <a href="mailto:{AGENCY_EMAIL}">Webagentur Muster</a></p></body></html>'
+    )
+    contact = f'<p>Schreiben Sie uns: {email}</p>' if kind == 'contact' else ''
+    site.pages['/kontakt'] = (f'<html><body><h2>Kontakt</h2>{contact}'
+                              f'<form><input name="name"><textarea name="msg"></textarea></form></body></html>')
+    return site
+
+def generate_corpus(companies, seed=42):
+    """Returns {host: Site}; every other company has a domain domain probing can guess"""
+    from email_scraper import clean_company_name
+    from domain_probe import candidate_domains
+    rng = random.Random(seed)
+    names = [f"{first} {second} GmbH" for first in FIRST_WORDS for second in SECOND_WORDS]
+    rng.shuffle(names)
+    sites = {}
+    for index, company in enumerate(names[:companies]):
+        first, second = company.lower().split()[:2]
+        if index % 2 == 0:
+            domain = candidate_domains(clean_company_name(company), TARGET_COUNTRY)[0]
+        else:
+            domain = f"{first}-{second}-gruppe.eu"
+        sites[domain] = build_site(company, domain, SITE_KINDS[index % len(SITE_KINDS)], index)
+    return sites
+
+def directory_page(site):
+    return (f'<html><body><h1>Firmenverzeichnis</h1><h2>{site.company}</h2><p>Branche: Industrie</p>'
+            f'<p>Redaktion: redaktion@{DIRECTORY_HOST}</p></body></html>')
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    """Answers proxied requests for corpus hosts; unknown hosts are dropped like a failed DNS lookup"""
+    protocol_version = 'HTTP/1.1'
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The scraper dropped the connection (deadline, hedged request or huge page)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def serve(self, send_body):
+        url = urlparse(self.path)
+        host = (url.hostname or self.headers.get('Host', '')).split(':')[0].lower()
+        host = host[4:] if host.startswith('www.') else host
+        sites = self.server.sites
+        path = url.path or '/'
+        if host == DIRECTORY_HOST:
+            site = sites.get(path.rsplit('/', 1)[-1])
+            body = directory_page(site) if site else None
+        elif host in sites:
+            site = sites[host]
+            body = site.pages.get(path.rstrip('/') or '/')
+            if site.kind == 'slow' and path == '/':
+                time.sleep(SLOW_SECONDS)
+        else:
+            self.close_connection = True
+            return
+
+        status = 200 if body is not None else 404
+        data = (body or '<html><body>Not found</body></html>').encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The scraper stopped reading a huge page
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(sites):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CorpusHandler)
+    server.daemon_threads = True
+    server.sites = sites
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_search_backend(sites):
+    from search_backend import SearchBackend
+
+    class CorpusSearchBackend(SearchBackend):
+        """Search stand-in: a directory listing, the home page and the impressum of the company in the query"""
+        name = 'corpus'
+
+        def search(self, query, num):
+            time.sleep(SEARCH_LATENCY)
+            query = query.lower()
+            for domain, site in sites.items():
+                if site.company.lower().replace(' gmbh', '') in query:
+                    return [f"http://{DIRECTORY_HOST}/firma/{domain}", f"http://{domain}/",
+                            f"http://{domain}/impressum"][:num]
+            return []
+
+    return CorpusSearchBackend()
+
+def check_decoys():
+    """Returns the DECOY_CASES the candidate scoring would accept"""
+    from email_scoring import CandidatePool
+    accepted = []
+    for company, email, url in DECOY_CASES:
+        candidates = CandidatePool(company)
+        candidates.add_page(url, [email], [])
+        if candidates.best_email():
+            accepted.append((company, email, candidates.score(email)))
+    return accepted
+
+def peak_memory_mb():
+    """Peak resident memory of the scraper process in MB (parse worker processes
+    not included), or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def run(companies, workers):
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    os.chdir(workdir)  # Fresh result store, caches and memos for every run
+    sites = generate_corpus(companies)
+    server = start_server(sites)
+    proxy = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.update({'HTTP_PROXY': proxy, 'HTTPS_PROXY': proxy, 'NO_PROXY': ''})
+
+    import email_scraper
+    from search_backend import CachedSearchBackend
+    email_scraper.PROBE_SCHEME = 'http'
+    email_scraper.setup_pipeline(CachedSearchBackend(make_search_backend(sites)))
+    email_scraper.start_hedge_pool(workers)
+
+    source_file = 'benchmark_companies.txt'
+    names = [site.company for site in sites.values()]
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(names))
+
+    latencies = []
+    skipped = []
+
+    def timed(index, company):
+        started = time.perf_counter()
+        email_scraper.process_company(index, company, len(names), TARGET_COUNTRY, skipped, source_file)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, range(1, len(names) + 1), names))
+    elapsed = time.perf_counter() - started
+
+    found = {company: email for company, email, status, _ in email_scraper.results_store.rows()}
+    correct = sum(1 for site in sites.values() if (found.get(site.company) or '-').lower() == (site.email or '-'))
+    wrong = [site for site in sites.values() if found.get(site.company, '-') != '-' and
+             found[site.company].lower() != (site.email or '').lower()]
+    decoys = [site for site in wrong if found[site.company].lower() == AGENCY_EMAIL]
+    for site in wrong:
+        print(f"Wrong address for {site.company} ({site.kind} site): {found[site.company]}, expected {site.email}")
+    if email_scraper.parse_pool is not None:
+        email_scraper.parse_pool.close()
+    server.shutdown()
+
+    print(f"\nStage timings (metrics and result stores kept in {workdir}):")
+    email_scraper.metrics.print_summary()
+    return {
+        'companies': len(names),
+        'workers': workers,
+        'companies_per_minute': round(len(names) / elapsed * 60, 1),
+        'p50_seconds': round(percentile(latencies, 0.5), 2),
+        'p95_seconds': round(percentile(latencies, 0.95), 2),
+        'peak_memory_mb': peak_memory_mb(),
+        'accuracy': round(correct / len(names), 3),
+        'wrong_addresses': len(wrong),
+        'decoy_addresses': len(decoys),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--save-baseline', action='store_true', help=f"store this run as {BASELINE_FILE}")
+    args = parser.parse_args()
+
+    baseline_path = os.path.abspath(BASELINE_FILE)
+    accepted = check_decoys()
+    for company, email, score in accepted:
+        print(f"Decoy accepted for {company}: {email} scores {score:.2f}")
+    report = run(min(args.companies, len(FIRST_WORDS) * len(SECOND_WORDS)), args.workers)
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"\n{'Metric':<24}{'Run':>12}{'Baseline':>12}")
+    for key, value in report.items():
+        previous = baseline.get(key, '') if baseline else ''
+        print(f"{key:<24}{str(value):>12}{str(previous):>12}")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    if accepted or report['decoy_addresses']:
+        raise SystemExit("Third-party addresses were accepted as company addresses")
+
+if __name__ == "__main__":
+    main()
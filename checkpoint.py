@@ -0,0 +1,77 @@
+import os
+import threading
+from results_store import connect_db
+
+CHECKPOINT_DB = 'checkpoints.db'
+LEGACY_PROGRESS_FILE = 'progress.txt'
+
+class CheckpointJournal:
+    """Per-line completion journal for company list files.
+
+    Every finished line is recorded as (source file, line number, company), so
+    workers may finish in any order and a restart resumes with exactly the
+    lines that are still open, even when company names repeat.
+    """
+    def __init__(self, path=CHECKPOINT_DB):
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                source_file TEXT,
+                line_no INTEGER,
+                company TEXT,
+                status TEXT,
+                completed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (source_file, line_no)
+            )
+        ''')
+        self._conn.commit()
+
+    @staticmethod
+    def source_key(source_file):
+        return os.path.abspath(source_file)
+
+    def complete(self, source_file, line_no, company, status):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO checkpoints (source_file, line_no, company, status) VALUES (?, ?, ?, ?)',
+                (self.source_key(source_file), line_no, company, status)
+            )
+            self._conn.commit()
+
+    def completed(self, source_file):
+        """Returns {line number: company} for every finished line of a file"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT line_no, company FROM checkpoints WHERE source_file = ?',
+                (self.source_key(source_file),)
+            ).fetchall()
+        return dict(rows)
+
+    def remaining(self, source_file, companies):
+        """Returns [(line number, company)] still to process. A line only counts
+        as done if it still holds the company that was recorded for it, so an
+        edited list file does not skip new entries."""
+        done = self.completed(source_file)
+        return [
+            (line_no, company) for line_no, company in enumerate(companies, 1)
+            if done.get(line_no) != company
+        ]
+
+    def import_legacy_progress(self, source_file, companies, progress_file=LEGACY_PROGRESS_FILE):
+        """One-time migration from progress.txt (last finished company name)"""
+        if not os.path.exists(progress_file) or self.completed(source_file):
+            return 0
+        with open(progress_file, 'r', encoding='utf-8', errors='replace') as f:
+            last_company = f.read().strip()
+        if last_company not in companies:
+            return 0
+        last_line = companies.index(last_company) + 1
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO checkpoints (source_file, line_no, company, status) VALUES (?, ?, ?, ?)',
+                [(self.source_key(source_file), line_no, company, 'Imported from progress.txt')
+                 for line_no, company in enumerate(companies[:last_line], 1)]
+            )
+            self._conn.commit()
+        return last_line
@@ -0,0 +1,145 @@
+import re
+import threading
+import unicodedata
+from results_store import connect_db
+from domain_probe import strip_legal_suffixes
+from site_crawler import registered_domain
+
+COMPANY_INDEX_DB = 'company_index.db'
+
+# Umlauts and ß are spelled out so "Müller" and "Mueller" share a key
+TRANSLITERATIONS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+def normalize_company(company):
+    """Dedup key for a company name: legal forms stripped, case, accents,
+    punctuation and spacing folded ("3DataX GmbH & Co KG" -> "3datax")"""
+    name = strip_legal_suffixes(company).casefold().translate(TRANSLITERATIONS)
+    name = unicodedata.normalize('NFKD', name)
+    return ''.join(char for char in name if char.isalnum() and char.isascii())
+
+# Shared mailbox providers say nothing about which company an address belongs to
+FREEMAIL_DOMAINS = {'gmail.com', 'googlemail.com', 'gmx.de', 'gmx.net', 'web.de', 't-online.de',
+                    'yahoo.com', 'hotmail.com', 'outlook.com', 'icloud.com', 'aol.com'}
+
+def email_domain(email):
+    """Company domain of an address, or None for placeholders and free-mail providers"""
+    if not email or '@' not in email:
+        return None
+    domain = email.rsplit('@', 1)[-1].strip().lower()
+    return domain if domain and domain not in FREEMAIL_DOMAINS else None
+
+def domain_label(domain):
+    """Registrable name of a domain without TLD, folded like a company key
+    ("mail.3-datax.co.uk" -> "3datax")"""
+    label = registered_domain(domain).split('.')[0]
+    return re.sub(r'[^a-z0-9]', '', label)
+
+class CompanyIndex:
+    """Persistent index of processed companies by normalized key, plus the
+    domains their addresses were found on.
+
+    Updated one row per result, so "already processed?" is a primary-key
+    lookup instead of loading every result at startup, and it is shared by
+    all country files and runs.
+    """
+    def __init__(self, path=COMPANY_INDEX_DB):
+        self._lock = threading.Lock()
+        self._claimed = {}  # key -> company being searched in this run
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS companies (
+                key TEXT PRIMARY KEY,
+                company TEXT,
+                status TEXT,
+                target_country TEXT,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                label TEXT,
+                key TEXT
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_domains_label ON domains(label)')
+        # Relabels rows written before labels were taken from the registered domain
+        self._conn.create_function('domain_label', 1, domain_label, deterministic=True)
+        self._conn.execute('UPDATE domains SET label = domain_label(domain) WHERE label IS NOT domain_label(domain)')
+        self._conn.commit()
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM companies LIMIT 1').fetchone() is None
+
+    def _insert(self, company, email, status, target_country):
+        key = normalize_company(company or '')
+        if not key:
+            return
+        self._conn.execute(
+            'INSERT OR REPLACE INTO companies (key, company, status, target_country) VALUES (?, ?, ?, ?)',
+            (key, company, status, target_country)
+        )
+        domain = email_domain(email)
+        if domain:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO domains (domain, label, key) VALUES (?, ?, ?)',
+                (domain, domain_label(domain), key)
+            )
+
+    def add(self, company, email, status, target_country):
+        with self._lock:
+            self._insert(company, email, status, target_country)
+            self._conn.commit()
+
+    def lookup(self, company):
+        """Returns the name a company was already processed under, or None.
+
+        Matches the normalized key first, then a known address domain whose
+        name equals the key (e.g. "3 Data X AG" after info@3datax.de)."""
+        key = normalize_company(company)
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute('SELECT company FROM companies WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    'SELECT c.company FROM domains d JOIN companies c ON c.key = d.key WHERE d.label = ? LIMIT 1',
+                    (key,)
+                ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, company):
+        """Returns the name this company duplicates (processed earlier or being
+        searched right now by another worker), or None after reserving its key"""
+        match = self.lookup(company)
+        if match:
+            return match
+        key = normalize_company(company)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._claimed:
+                return self._claimed[key]
+            self._claimed[key] = company
+        return None
+
+    def import_results(self, rows):
+        """One-time build from existing (company, email, status, target_country) rows"""
+        with self._lock:
+            for row in rows:
+                self._insert(*row)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def open_company_index(results_store, exclude_statuses=(), path=COMPANY_INDEX_DB):
+    """Opens the index, building it from the results store on first use"""
+    index = CompanyIndex(path)
+    if index.is_empty() and not results_store.is_empty():
+        rows = results_store.rows(exclude_statuses=exclude_statuses)
+        index.import_results(rows)
+        print(f"Indexed {len(rows)} existing results into {path}")
+    return index
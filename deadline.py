@@ -0,0 +1,94 @@
+import threading
+import time
+from contextlib import contextmanager
+
+COMPANY_TIME_BUDGET = 90  # Seconds one company may spend in search, fetch and parse
+
+class DeadlineExceeded(Exception):
+    """Raised when a company's time budget runs out"""
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(f"time budget of {self.seconds}s exceeded")
+
+    def timeout(self, default):
+        """A per-operation timeout that never outlives the deadline"""
+        self.check()
+        return min(default, self.remaining())
+
+_local = threading.local()
+
+def current():
+    """The deadline active in this thread, or None"""
+    return getattr(_local, 'deadline', None)
+
+@contextmanager
+def activate(deadline):
+    previous = current()
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
+def check():
+    deadline = current()
+    if deadline is not None:
+        deadline.check()
+
+def timeout(default):
+    deadline = current()
+    return default if deadline is None else deadline.timeout(default)
+
+def remaining(default=None):
+    deadline = current()
+    return default if deadline is None else deadline.remaining()
+
+def bind(func):
+    """Wraps func so it runs under the caller's deadline in another thread"""
+    deadline = current()
+    if deadline is None:
+        return func
+
+    def run(*args, **kwargs):
+        with activate(deadline):
+            return func(*args, **kwargs)
+    return run
+
+def call(func, *args):
+    """Runs a blocking call that has no timeout of its own (e.g. a search) and
+    gives up on it when the active deadline expires. The call runs under the
+    same deadline, so it can check it and stop before doing more work."""
+    limit = remaining()
+    if limit is None:
+        return func(*args)
+    check()
+    outcome = {}
+    done = threading.Event()
+    bound = bind(func)
+
+    def target():
+        try:
+            outcome['value'] = bound(*args)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=target, daemon=True).start()
+    if not done.wait(limit):
+        raise DeadlineExceeded("time budget exceeded while waiting for a blocking call")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
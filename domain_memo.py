@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from urllib.parse import urlparse
+from results_store import connect_db
+from site_crawler import registered_domain
+from email_scoring import page_type
+
+DOMAIN_MEMO_DB = 'domain_memo.db'
+DOMAIN_MEMO_TTL = 30 * 24 * 3600  # Seconds a domain's addresses are reused for other companies
+DOMAIN_NEGATIVE_TTL = 7 * 24 * 3600  # Seconds a domain without any address is not fetched again
+
+def is_site_page(url):
+    """True for a site's home, contact, impressum or about page. Deeper pages
+    (directory listings, news articles) describe other companies too and are
+    never answered from the memo."""
+    return urlparse(url).path.strip('/') == '' or page_type(url) != 'other'
+
+def own_addresses(domain, found):
+    """Findings whose address lives on the scanned domain itself"""
+    return [item for item in found
+            if item[0].lower().rsplit('@', 1)[-1] == domain or item[0].lower().endswith('.' + domain)]
+
+class DomainMemo:
+    """Addresses and contact pages already discovered per registered domain.
+
+    Subsidiaries and brands often share one website; once a domain has been
+    scanned, later companies resolving to it reuse the stored addresses
+    instead of fetching and crawling it again. Domains that yielded nothing
+    are remembered for a shorter negative TTL.
+    """
+    def __init__(self, path=DOMAIN_MEMO_DB, ttl=DOMAIN_MEMO_TTL, negative_ttl=DOMAIN_NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                emails TEXT,
+                updated_at REAL
+            )
+        ''')
+        self._conn.commit()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def _load(self, domain):
+        row = self._conn.execute('SELECT emails, updated_at FROM domains WHERE domain = ?', (domain,)).fetchone()
+        if row is None:
+            return None
+        emails = json.loads(row[0])
+        ttl = self.ttl if emails else self.negative_ttl
+        if time.time() - row[1] > ttl:
+            return None
+        return emails
+
+    def get(self, domain):
+        """Returns {email: [url, source type, from html]} for a known domain
+        ({} when it had none), or None when it is unknown or expired"""
+        with self._lock:
+            emails = self._load(domain)
+            if emails is None:
+                self.misses += 1
+            elif emails:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+            return emails
+
+    def record(self, domain, found):
+        """Merges (email, url, source type, from html) findings into the domain's
+        entry; an empty list marks the domain as having no address"""
+        with self._lock:
+            emails = self._load(domain) or {}
+            for email, url, source_type, from_html in found:
+                emails.setdefault(email.lower(), [url, source_type, from_html])
+            self._conn.execute(
+                'INSERT OR REPLACE INTO domains (domain, emails, updated_at) VALUES (?, ?, ?)',
+                (domain, json.dumps(emails), time.time())
+            )
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
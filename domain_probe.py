@@ -0,0 +1,159 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from html_extractor import extract_page_emails
+import deadline
+
+PROBE_PATHS = ['/impressum', '/kontakt', '/contact', '/about', '/']
+PROBE_WORKERS = 4
+
+# Legal forms stripped before guessing a domain ("3DataX GmbH & Co KG" -> "3datax")
+LEGAL_SUFFIXES = re.compile(
+    r'\b(?:gmbh|mbh|ag|kg|kgaa|ohg|gbr|ug|se|e\.?\s?k|e\.?\s?v|co|b\.?\s?v|n\.?\s?v|v\.?\s?o\.?\s?f|'
+    r'ltd|llc|llp|inc|corp|plc|s\.?\s?a|s\.?\s?a\.?\s?s|sarl|s\.?\s?r\.?\s?l|s\.?\s?p\.?\s?a|'
+    r'oy|ab|as|aps|a/s|bvba|haftungsbeschr[aä]nkt)\b\.?',
+    re.IGNORECASE
+)
+
+# Country TLDs tried first for each target country file name (Turkish and English names)
+COUNTRY_TLDS = {
+    'almanya': ['de', 'com'],
+    'germany': ['de', 'com'],
+    'deutschland': ['de', 'com'],
+    'hollanda': ['nl', 'com', 'eu'],
+    'holland': ['nl', 'com', 'eu'],
+    'netherlands': ['nl', 'com', 'eu'],
+    'avusturya': ['at', 'de', 'com'],
+    'austria': ['at', 'de', 'com'],
+    'isviçre': ['ch', 'com'],
+    'switzerland': ['ch', 'com'],
+    'belçika': ['be', 'com'],
+    'belgium': ['be', 'com'],
+    'ingiltere': ['co.uk', 'com'],
+    'uk': ['co.uk', 'com'],
+}
+DEFAULT_TLDS = ['com', 'de']
+
+def strip_legal_suffixes(company):
+    """Removes legal forms and joining words such as '&' from a company name"""
+    name = LEGAL_SUFFIXES.sub(' ', company)
+    name = re.sub(r'[&+]|\bund\b|\band\b', ' ', name, flags=re.IGNORECASE)
+    return re.sub(r'\s+', ' ', name).strip()
+
+def candidate_domains(clean_company, target_country='', first_word=True):
+    """Guesses likely company domains, country TLDs first and the full name
+    before its first word alone"""
+    name = strip_legal_suffixes(clean_company).lower()
+    words = [word for word in re.split(r'[^a-z0-9-]+', name) if word]
+    if not words:
+        return []
+
+    labels = [''.join(words)]
+    if len(words) > 1:
+        labels.append('-'.join(words))
+        if first_word and len(words[0]) >= 4:
+            labels.append(words[0])
+
+    tlds = COUNTRY_TLDS.get(target_country.lower(), DEFAULT_TLDS)
+    domains = []
+    for tld in tlds:
+        for label in labels:
+            domain = f"{label.strip('-')}.{tld}"
+            if domain not in domains:
+                domains.append(domain)
+    return domains
+
+def company_tokens(clean_company):
+    """Distinctive name parts (legal forms removed) expected in a company's own domain"""
+    return [part for part in strip_legal_suffixes(clean_company).lower().split() if len(part) >= 3]
+
+def matches_company(email, domain, tokens):
+    """True when an address lives on the probed domain or a domain containing the company name"""
+    email_domain = email.rsplit('@', 1)[-1]
+    return email_domain == domain or email_domain.endswith('.' + domain) or \
+        any(token in email_domain for token in tokens)
+
+def mentions_company(content, clean_company):
+    """True when a page names the company ("Hansa Metall" in any case or spacing)"""
+    words = strip_legal_suffixes(clean_company).lower().split()
+    if not words:
+        return False
+    pattern = r'[\s\-]*'.join(re.escape(word) for word in words).encode('utf-8')
+    return re.search(pattern, content, re.IGNORECASE) is not None
+
+def probe_company_domains(clean_company, target_country, head, fetch, max_workers=PROBE_WORKERS,
+                          extract=extract_page_emails, scheme='https'):
+    """Looks for company addresses on guessed domains before any search.
+
+    head(url) must raise for unreachable hosts and should not retry, since most
+    guessed domains do not exist; fetch(url) returns a response with
+    .content/.encoding. Returns [(email, url, from html)] found on the
+    best-ranked guessed domain that has any, for the caller to score; [] when
+    no probe hits. A first-word guess ("hansa.de" for "Hansa Metall") only
+    counts when its page names the company, since it often belongs to another.
+    """
+    domains = candidate_domains(clean_company, target_country)
+    if not domains:
+        return []
+    tokens = company_tokens(clean_company)
+    partial = set(domains) - set(candidate_domains(clean_company, target_country, first_word=False))
+
+    def is_alive(domain):
+        try:
+            head(f"{scheme}://{domain}/")
+            return True
+        except Exception:
+            return False
+
+    def probe(domain, path):
+        url = f"{scheme}://{domain}{path}"
+        response = fetch(url)
+        if domain in partial and not mentions_company(response.content, clean_company):
+            return []
+        html_emails, text_emails = extract(response.content, response.encoding)
+        return [(email, url, from_html)
+                for emails, from_html in ((html_emails, True), (text_emails, False))
+                for email in emails if matches_company(email, domain, tokens)]
+
+    def best_hits(final):
+        # Hits of the best-ranked domain, once no better-ranked domain can still produce one
+        for domain in alive:
+            if hits[domain]:
+                return sorted(hits[domain], key=lambda hit: PROBE_PATHS.index(hit[3]))
+            if pending[domain] and not final:
+                return None
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    hits = {}
+    pending = {}
+    result = None
+    try:
+        alive = [domain for domain, ok in zip(domains, executor.map(deadline.bind(is_alive), domains)) if ok]
+        if not alive:
+            return []
+        print(f"Probing domains: {', '.join(alive)}")
+
+        futures = {}
+        for domain in alive:
+            hits[domain] = []
+            pending[domain] = len(PROBE_PATHS)
+            for path in PROBE_PATHS:
+                futures[executor.submit(deadline.bind(probe), domain, path)] = (domain, path)
+        for future in as_completed(futures, timeout=deadline.remaining()):
+            domain, path = futures[future]
+            pending[domain] -= 1
+            try:
+                hits[domain] += [(email, url, from_html, path) for email, url, from_html in future.result()]
+            except Exception:
+                pass
+            result = best_hits(final=False)
+            if result is not None:
+                break
+    except TimeoutError:
+        pass  # The company's time budget ran out; the caller raises DeadlineExceeded
+    finally:
+        # A decided ranking ends the stage: queued probes are dropped and running ones are not waited for
+        executor.shutdown(wait=False, cancel_futures=True)
+    if result is None:
+        result = best_hits(final=True) if hits else []
+    return [(email, url, from_html) for email, url, from_html, _ in result]
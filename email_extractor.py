@@ -0,0 +1,80 @@
+import re
+
+# Obfuscated separators such as "info [at] firma (dot) de"
+_AT = r'(?:@|\s*[\[\(\{]\s*at\s*[\]\)\}]\s*)'
+_DOT = r'(?:\.|\s*[\[\(\{]\s*dot\s*[\]\)\}]\s*)'
+
+# Single compiled pattern covering plain, mailto: and obfuscated addresses.
+# The lookbehind anchors matches at token starts so failing scans stay linear.
+EMAIL_PATTERN = re.compile(
+    r'(?<![A-Za-z0-9._%+-])'
+    r'(?:mailto:)?'
+    r'([A-Za-z0-9._%+-]{1,64})'
+    + _AT +
+    r'([A-Za-z0-9-]{1,63}(?:' + _DOT + r'[A-Za-z0-9-]{1,63}){0,8})'
+    + _DOT +
+    r'([A-Za-z]{2,24})(?![A-Za-z0-9-])',
+    re.IGNORECASE
+)
+_DOT_TOKEN = re.compile(_DOT, re.IGNORECASE)
+
+# Upper bound on the length of a (possibly obfuscated) match, used as the chunk overlap
+MAX_MATCH_LENGTH = 1024
+CHUNK_SIZE = 64 * 1024
+SPAM_DOMAINS = ('example.com', 'test.com')
+FILE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'css', 'js')
+
+def _normalize(match):
+    local, domain, tld = match.groups()
+    tld = tld.lower()
+    if tld in FILE_EXTENSIONS:  # Retina image names like logo@2x.png
+        return None
+    domain = _DOT_TOKEN.sub('.', domain).lower()
+    email = f"{local.strip('.').lower()}@{domain}.{tld}"
+    if any(spam in email for spam in SPAM_DOMAINS):
+        return None
+    return email
+
+def _chunks(source):
+    # Coalesce small pieces (e.g. soup.strings) into CHUNK_SIZE blocks
+    if isinstance(source, str):
+        for start in range(0, len(source), CHUNK_SIZE):
+            yield source[start:start + CHUNK_SIZE]
+        return
+    pending = []
+    size = 0
+    for piece in source:
+        pending.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield ''.join(pending)
+
+def iter_emails(source):
+    """Yields normalized email candidates from a string or an iterable of text
+    chunks in a single scan, keeping only a small overlap between chunks"""
+    buffer = ''
+    for chunk in _chunks(source):
+        buffer += chunk
+        # Matches ending inside the last MAX_MATCH_LENGTH characters may continue in the next chunk
+        safe_end = len(buffer) - MAX_MATCH_LENGTH
+        cut = max(len(buffer) - 2 * MAX_MATCH_LENGTH, 0)
+        for match in EMAIL_PATTERN.finditer(buffer):
+            if match.end() > safe_end:
+                break
+            cut = max(cut, match.end())
+            email = _normalize(match)
+            if email:
+                yield email
+        buffer = buffer[cut:]
+    for match in EMAIL_PATTERN.finditer(buffer):
+        email = _normalize(match)
+        if email:
+            yield email
+
+def extract_emails(source):
+    """Returns unique email candidates in order of first appearance"""
+    return list(dict.fromkeys(iter_emails(source)))
@@ -0,0 +1,129 @@
+import math
+from difflib import SequenceMatcher
+from urllib.parse import urlparse
+from domain_probe import company_tokens, strip_legal_suffixes
+from site_crawler import registered_domain
+
+# A candidate at or above CONFIDENT_SCORE ends the search for the company;
+# ACCEPT_SCORE is good enough to skip further queries; below MIN_SCORE is dropped
+CONFIDENT_SCORE = 5.0
+ACCEPT_SCORE = 3.0
+MIN_SCORE = 2.5
+# Addresses whose domain neither resembles the company nor is the source page's
+# own domain (web agencies, hosters, directories) are capped below MIN_SCORE
+DOMAIN_MATCH_RATIO = 0.7
+UNMATCHED_MAX_SCORE = 2.0
+OFF_SITE_PENALTY = 3.0
+
+HIRING_PREFIXES = ('jobs', 'job', 'career', 'careers', 'karriere', 'bewerbung', 'hr', 'recruiting',
+                   'personal', 'talent')
+GENERAL_PREFIXES = ('info', 'contact', 'kontakt', 'office', 'mail', 'hello', 'hallo', 'post', 'welcome')
+UNWANTED_PREFIXES = ('noreply', 'no-reply', 'donotreply', 'abuse', 'postmaster', 'webmaster', 'hostmaster',
+                     'privacy', 'datenschutz', 'dsb', 'support', 'newsletter')
+# Web agencies, hosting providers and page-builder boilerplate that show up on company pages
+THIRD_PARTY_DOMAINS = ('sentry.io', 'wixpress.com', 'wix.com', 'wordpress.com', 'jimdo.com', 'ionos.de',
+                       'strato.de', 'godaddy.com', 'cloudflare.com', 'w3.org', 'schema.org', 'domain.com',
+                       'email.com', 'yourdomain.com', 'mustermann.de', 'musterfirma.de', 'google.com')
+
+PAGE_TYPE_WEIGHTS = {'probe': 1.5, 'impressum': 1.5, 'contact': 1.5, 'about': 0.5, 'other': 0.0}
+
+def page_type(url):
+    """Classifies a source page by its path"""
+    path = urlparse(url).path.lower()
+    if any(keyword in path for keyword in ('impressum', 'imprint', 'legal')):
+        return 'impressum'
+    if any(keyword in path for keyword in ('kontakt', 'contact')):
+        return 'contact'
+    if any(keyword in path for keyword in ('about', 'ueber-uns', 'uber-uns', 'unternehmen', 'company')):
+        return 'about'
+    return 'other'
+
+class CandidatePool:
+    """Collects every address seen for one company and ranks them"""
+    def __init__(self, clean_company):
+        self.tokens = company_tokens(clean_company)
+        self.joined_name = ''.join(strip_legal_suffixes(clean_company).lower().split())
+        self._sources = {}  # email -> {url: (page type, from html, tag)}
+        self.pages_scanned = 0
+        self.tag = None  # Label of the search currently feeding the pool, e.g. a query template
+        self.domains = set()  # Registered domains fetched for this company
+
+    def add(self, email, url, source_type=None, from_html=False):
+        sources = self._sources.setdefault(email.lower(), {})
+        previous = sources.get(url, (None, False, self.tag))
+        sources[url] = (source_type or page_type(url), from_html or previous[1], previous[2])
+
+    def add_page(self, url, html_emails, text_emails, source_type=None):
+        self.pages_scanned += 1
+        for email in html_emails:
+            self.add(email, url, source_type, from_html=True)
+        for email in text_emails:
+            self.add(email, url, source_type)
+
+    def domain_similarity(self, email_or_url):
+        # "info@mail.firma.co.uk" -> "firma"
+        label = registered_domain(email_or_url.rsplit('@', 1)[-1]).split('.')[0]
+        if any(token in label for token in self.tokens):
+            return 1.0
+        if not self.joined_name:
+            return 0.0
+        return SequenceMatcher(None, label, self.joined_name).ratio()
+
+    def score(self, email):
+        sources = self._sources.get(email.lower())
+        if not sources:
+            return 0.0
+        local, domain = email.lower().rsplit('@', 1)
+        similarity = self.domain_similarity(email)
+        score = 5.0 * similarity
+
+        if local.startswith(HIRING_PREFIXES):
+            score += 2.0
+        elif local.startswith(GENERAL_PREFIXES):
+            score += 1.5
+        elif local.startswith(UNWANTED_PREFIXES):
+            score -= 2.0
+        if any(domain == third or domain.endswith('.' + third) for third in THIRD_PARTY_DOMAINS):
+            score -= 3.0
+
+        score += max(PAGE_TYPE_WEIGHTS.get(kind, 0.0) for kind, _, _ in sources.values())
+        if any(from_html for _, from_html, _ in sources.values()):
+            score += 0.5
+        # Addresses repeated across several pages are more likely the real contact
+        score += 0.75 * math.log2(len(sources))
+
+        # Prefix, page and mailto bonuses alone must not accept an unrelated address
+        own_domain = registered_domain(domain)
+        if similarity < DOMAIN_MATCH_RATIO and all(registered_domain(url) != own_domain for url in sources):
+            if any(self.domain_similarity(url) >= DOMAIN_MATCH_RATIO for url in sources):
+                score -= OFF_SITE_PENALTY  # Someone else's address on the company's own site
+            score = min(score, UNMATCHED_MAX_SCORE)
+        elif local.startswith(UNWANTED_PREFIXES):
+            # A no-reply or privacy mailbox is only a last resort, never enough to stop searching
+            score = min(score, MIN_SCORE)
+        return score
+
+    def tags(self, email):
+        """Labels of the searches that surfaced an address, in the order they did"""
+        return [tag for _, _, tag in self._sources.get(email.lower(), {}).values() if tag]
+
+    def ranked(self):
+        return sorted(((self.score(email), email) for email in self._sources), reverse=True)
+
+    def best(self):
+        """Returns (email, score) of the top candidate, or (None, 0.0)"""
+        ranked = self.ranked()
+        if not ranked:
+            return None, 0.0
+        score, email = ranked[0]
+        return email, score
+
+    def best_email(self):
+        email, score = self.best()
+        return email if score >= MIN_SCORE else None
+
+    def is_confident(self):
+        return self.best()[1] >= CONFIDENT_SCORE
+
+    def is_acceptable(self):
+        return self.best()[1] >= ACCEPT_SCORE
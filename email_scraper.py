@@ -1,102 +1,284 @@
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 import re
-from googlesearch import search
 import time
 import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, TimeoutError
+from urllib.parse import urlparse
 from colorama import init, Fore, Style
+from results_store import open_results_store, RESULTS_EXCEL
+from page_cache import PageCache, CachedResponse
+from http_client import FetchClient, is_text_response, read_body
+from search_backend import create_search_backend
+from html_extractor import extract_page_emails
+from domain_probe import probe_company_domains, company_tokens, matches_company
+from site_crawler import crawl_site, site_host, CRAWL_TIME_BUDGET
+from email_scoring import CandidatePool
+from query_planner import QueryPlanner, QUERY_TEMPLATES, print_stats
+from rate_limiter import RateLimiter, parse_retry_after, print_state
+import deadline
+from deadline import Deadline, DeadlineExceeded, COMPANY_TIME_BUDGET
+from parse_pool import ParsePool, PARSE_PROCESSES
+from checkpoint import CheckpointJournal
+from company_index import open_company_index
+from domain_memo import DomainMemo, registered_domain, is_site_page, own_addresses
+from metrics import Metrics, METRICS_PROM
 
-def load_progress():
-    if os.path.exists('progress.txt'):
-        # Try different character encodings
-        encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
-        for encoding in encodings:
-            try:
-                with open('progress.txt', 'r', encoding=encoding) as f:
-                    content = f.read().strip()
-                    # Return None if file is empty or contains only whitespace
-                    return content if content else None
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                print(f"{Fore.YELLOW}Error reading progress file: {str(e)}{Style.RESET_ALL}")
-                continue
-        
-        # If no encoding worked
-        print(f"{Fore.YELLOW}Could not read progress file. Starting from beginning.{Style.RESET_ALL}")
-        return None
-    return None
+# Concurrency settings for the worker-pool mode
+MAX_WORKERS = 4
+MAX_REQUESTS_PER_HOST = 2
+
+# Search backend: 'google' for live results, 'fixture' for offline runs from SEARCH_FIXTURE_FILE
+SEARCH_BACKEND = 'google'
+SEARCH_FIXTURE_FILE = 'search_fixtures.json'
+FETCH_TIMEOUT = 10
+MAX_PAGE_BYTES = 2 * 1024 * 1024  # Larger pages are cut off after this many bytes
+PROBE_TIMEOUT = 5  # Seconds allowed for a guessed domain to answer
+PROBE_SCHEME = 'https'  # Scheme used for guessed domains; offline benchmarks serve plain http
+SEARCH_RETRIES = 3
+# Google starts at one query every 2 seconds and adapts between 1/s and 1 per 2 minutes
+SEARCH_RATE = 0.5
+SEARCH_MAX_RATE = 1.0
+SEARCH_MIN_RATE = 1 / 120
+THROTTLE_STATUSES = (429, 503)
+HEDGE_AFTER = 3.0  # Seconds before a second request is sent to a slow host; None disables hedging
+HEDGE_THREADS_PER_WORKER = 8  # Download threads per company worker (probes and crawls fetch in parallel)
+METRICS_EVERY = 10  # Companies between Prometheus textfile refreshes
+DEADLINE_STATUS = "Deadline exceeded"  # Not treated as searched, so the company is retried next run
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 0.5  # Seconds, doubled on each retry
+POOL_HOSTS = 100  # Number of per-host connection pools kept alive
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+class HostThrottled(Exception):
+    """Raised when a URL's host cannot be reached within the company's time
+    budget (rate-limit cooldown or no free request slot); only that URL is skipped"""
+
+class HostLimiter:
+    """Caps the number of simultaneous requests sent to a single host"""
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def slot(self, url_or_host):
+        host = urlparse(url_or_host).netloc or url_or_host
+        host = host.lower()
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.limit)
+            return self._slots[host]
 
-def save_progress(company):
+    @contextmanager
+    def hold(self, url_or_host, timeout=None):
+        """Holds one of the host's slots, giving up after timeout seconds"""
+        slot = self.slot(url_or_host)
+        if not slot.acquire(timeout=timeout):
+            deadline.check()
+            raise HostThrottled(f"no free request slot for {site_host(url_or_host) or url_or_host}")
+        try:
+            yield
+        finally:
+            slot.release()
+
+host_limiter = HostLimiter(MAX_REQUESTS_PER_HOST)
+hedge_pool = None
+rate_limiter = RateLimiter()
+rate_limiter.configure('search:google', SEARCH_RATE, SEARCH_MAX_RATE, SEARCH_MIN_RATE)
+metrics = Metrics()
+results_store = None
+page_cache = None
+http_client = None
+probe_client = None
+search_backend = None
+query_planner = None
+parse_pool = None
+checkpoints = None
+company_index = None
+domain_memo = None
+
+def save_progress(source_file, line_no, company, status):
     try:
-        with open('progress.txt', 'w', encoding='utf-8') as f:
-            f.write(company)
+        checkpoints.complete(source_file, line_no, company, status)
     except Exception as e:
         print(f"{Fore.YELLOW}Error saving progress: {str(e)}{Style.RESET_ALL}")
 
-def update_excel(company, email, status, target_country):
-    filename = 'email_results.xlsx'
-    
-    if os.path.exists(filename):
-        df = pd.read_excel(filename)
+def save_result(company, email, status, target_country, seconds=None):
+    # O(1) append; the workbook is exported once at the end of the run. A
+    # company's earlier timeout row is replaced, so retries leave no stale rows
+    with metrics.stage('save'):
+        results_store.append(company, email, status, target_country, replaces=(DEADLINE_STATUS,))
+        if status != DEADLINE_STATUS:  # Timed-out companies stay searchable next run
+            company_index.add(company, email, status, target_country)
+    metrics.count('companies')
+    if status == "Email found":
+        metrics.count('emails_found')
+    metrics.log('result', company=company, status=status, target_country=target_country,
+                seconds=None if seconds is None else round(seconds, 3))
+
+def company_email_detector(clean_company):
+    """Returns a predicate that spots an address on a domain containing the company name"""
+    tokens = [re.escape(part) for part in company_tokens(clean_company)]
+    if not tokens:
+        return None
+    pattern = re.compile(
+        rb'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]*(?:' + '|'.join(tokens).encode('utf-8') + rb')[A-Za-z0-9.-]*\.[A-Za-z]{2,}',
+        re.IGNORECASE
+    )
+    return lambda window: pattern.search(window) is not None
+
+def company_email_filter(clean_company):
+    """Returns accept(email, url): a strong hit is an address on the page's own
+    site or on a domain containing the company name"""
+    tokens = company_tokens(clean_company)
+    return lambda email, url: matches_company(email, site_host(url), tokens)
+
+def host_key(url):
+    return f"host:{site_host(url)}"
+
+def report_response(url, response):
+    """Feeds a site's answer back into its token bucket"""
+    if response.status_code in THROTTLE_STATUSES:
+        rate_limiter.throttle(host_key(url), parse_retry_after(response.headers.get('Retry-After')))
     else:
-        df = pd.DataFrame(columns=['Company', 'Email', 'Status', 'Target Country'])
-    
-    new_row = pd.DataFrame({
-        'Company': [company], 
-        'Email': [email], 
-        'Status': [status],
-        'Target Country': [target_country]
-    })
-    df = pd.concat([df, new_row], ignore_index=True)
-    df.to_excel(filename, index=False)
-
-def find_email(text):
-    # More comprehensive email pattern
-    email_patterns = [
-        r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}',  # Standard email
-        r'(?:mailto:)?([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})',  # mailto: links
-        r'[A-Za-z0-9._%+-]+\s*[\[\(]at\[\)\]][A-Za-z0-9.-]+\.[A-Z|a-z]{2,}',  # at/@ variations
-    ]
-    
-    found_emails = []
-    for pattern in email_patterns:
-        emails = re.findall(pattern, text, re.IGNORECASE)
-        found_emails.extend(emails)
-    
-    # Email validation and cleaning
-    valid_emails = []
-    for email in found_emails:
-        email = email.strip().lower()
-        if '@' in email and '.' in email.split('@')[1]:
-            # Filter general/spam emails
-            if not any(spam in email for spam in ['example.com', 'test.com']):
-                valid_emails.append(email)
-    
-    return valid_emails[0] if valid_emails else None
+        rate_limiter.success(host_key(url))
 
-def extract_emails_from_html(soup):
-    emails = set()
-    
-    # Collect emails from links
-    for link in soup.find_all('a'):
-        href = link.get('href', '')
-        if 'mailto:' in href:
-            email = href.replace('mailto:', '').strip()
-            emails.add(email)
+def acquire_host(url):
+    """Waits for the host's token bucket, but never past the company deadline;
+    a host cooling down longer than that is skipped with HostThrottled"""
+    with metrics.stage('rate_wait'):
+        waited = rate_limiter.acquire(host_key(url), deadline.remaining())
+    if waited is None:
+        deadline.check()
+        metrics.count('host_throttled')
+        raise HostThrottled(f"rate limit wait for {site_host(url)} exceeds the time budget")
+
+def stop_at_deadline(stop_when):
+    """Extends an early-exit predicate so streaming also stops when the deadline expires"""
+    current = deadline.current()
+    if current is None:
+        return stop_when
+    return lambda window: current.expired() or (stop_when is not None and stop_when(window))
+
+def download_once(url, extra_headers=None, stop_when=None, started=None):
+    """Streams a page while holding one of the host's request slots.
+
+    Non-text content types are rejected from the headers, bodies are capped at
+    MAX_PAGE_BYTES and the download stops once stop_when matches a chunk. The
+    `started` event is set once the request is actually sent.
+    """
+    headers = dict(REQUEST_HEADERS, **(extra_headers or {}))
+    client = http_client or requests
+    acquire_host(url)
+    with host_limiter.hold(url, deadline.timeout(FETCH_TIMEOUT)), metrics.stage('fetch'):
+        metrics.count('fetches')
+        if started is not None:
+            started.set()
+        response = client.get(url, timeout=deadline.timeout(FETCH_TIMEOUT), headers=headers, stream=True)
+        report_response(url, response)
+        if not is_text_response(response):
+            print(f"Skipping non-text content ({response.headers.get('Content-Type')}): {url}")
+            response.close()
+            content, truncated = b'', False
+        else:
+            content, truncated = read_body(response, MAX_PAGE_BYTES, stop_at_deadline(stop_when))
+    page = CachedResponse(url, response.status_code, content, response.encoding,
+                          response.headers.get('Content-Type', ''), headers=response.headers,
+                          truncated=truncated)
+    # Only the size cap truncates the same way for every caller. A body cut short
+    # by this company's early-exit predicate or its deadline is scanned but never
+    # cached, so other companies still get the whole page and all its links
+    page.cacheable = not truncated or len(content) >= MAX_PAGE_BYTES
+    return page
+
+def download_page(url, extra_headers=None, stop_when=None):
+    """Downloads a page, sending a hedged second request when the host has not
+    answered within HEDGE_AFTER seconds; the first response wins"""
+    attempt = deadline.bind(download_once)
+    if HEDGE_AFTER is None or hedge_pool is None:
+        return attempt(url, extra_headers, stop_when)
     
-    # Check elements with specific classes and IDs
-    contact_elements = soup.find_all(class_=lambda x: x and ('contact' in x.lower() or 
-                                                           'email' in x.lower() or 
-                                                           'impressum' in x.lower()))
-    for element in contact_elements:
-        text = element.get_text()
-        found = find_email(text)
-        if found:
-            emails.add(found)
+    started = threading.Event()
+    attempts = [hedge_pool.submit(attempt, url, extra_headers, stop_when, started)]
+    attempts[0].add_done_callback(lambda future: started.set())
+    # HEDGE_AFTER counts from when the request is sent, not from time spent
+    # queued for a pool thread, a rate-limit token or a host slot
+    started.wait(deadline.remaining())
+    done, _ = wait(attempts, timeout=HEDGE_AFTER)
+    if not done and deadline.remaining(FETCH_TIMEOUT) > HEDGE_AFTER:
+        print(f"Slow response, sending hedged request: {url}")
+        attempts.append(hedge_pool.submit(attempt, url, extra_headers, stop_when))
     
-    return list(emails)
+    error = None
+    try:
+        for future in as_completed(attempts, timeout=deadline.remaining()):
+            try:
+                return future.result()
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                error = e
+    except TimeoutError:
+        raise DeadlineExceeded(f"time budget exceeded while fetching {url}")
+    raise error
+
+def probe_head(url):
+    """Cheap HEAD request used to check whether a guessed domain exists; sent
+    without retries, so an unreachable guess fails after one attempt"""
+    client = probe_client or requests
+    acquire_host(url)
+    with host_limiter.hold(url, deadline.timeout(PROBE_TIMEOUT)), metrics.stage('head'):
+        metrics.count('head_requests')
+        response = client.head(url, timeout=deadline.timeout(PROBE_TIMEOUT), headers=REQUEST_HEADERS)
+    report_response(url, response)
+    return response
+
+def start_hedge_pool(workers):
+    """Sizes the download thread pool for the number of company workers"""
+    global hedge_pool
+    if hedge_pool is not None:
+        hedge_pool.shutdown(wait=False)
+    hedge_pool = ThreadPoolExecutor(max_workers=workers * HEDGE_THREADS_PER_WORKER)
+
+def extract_response_emails(content, encoding=None):
+    """Email extraction for a downloaded body, in the parse process pool when enabled"""
+    with metrics.stage('parse'):
+        if parse_pool is None:
+            return extract_page_emails(content, encoding)
+        return parse_pool.extract(content, encoding)
+
+def fetch_page(url, stop_when=None):
+    """Serves a page from the on-disk cache, downloading it only when needed"""
+    def get(page_url, extra_headers):
+        return download_page(page_url, extra_headers, stop_when)
+    if page_cache is None:
+        return get(url, None)
+    return page_cache.fetch(url, get)
+
+def run_search(search_query, num):
+    """Runs a search query through the configured (cached) search backend"""
+    global search_backend
+    if search_backend is None:
+        search_backend = create_search_backend(SEARCH_BACKEND, SEARCH_FIXTURE_FILE,
+                                               host_limiter=host_limiter, rate_limiter=rate_limiter)
+    metrics.count('queries')
+    with metrics.stage('search'):
+        return deadline.call(search_backend.search, search_query, num)
+
+def search_with_retry(search_query, num):
+    """Runs a search, retrying after rate-limit errors; the backend's token
+    bucket holds the retry back until its cooldown has passed"""
+    for attempt in range(SEARCH_RETRIES):
+        try:
+            return run_search(search_query, num)
+        except Exception as e:
+            if "429" not in str(e) or attempt == SEARCH_RETRIES - 1:
+                raise
+            metrics.count('search_retries')
+            print(f"{Fore.YELLOW}⚠️ Google query limit exceeded. Retrying after cooldown...{Style.RESET_ALL}")
 
 def clean_company_name(company):
     """Cleans special characters from company name, preserves important ones"""
@@ -106,44 +288,48 @@ def clean_company_name(company):
     cleaned = re.sub(r'\s+', ' ', cleaned)
     return cleaned.strip()
 
-def scrape_company_email(company):
+def scrape_company_email(company, target_country=''):
     try:
         # Clean company name
         clean_company = clean_company_name(company)
         print(f"Cleaned company name: {clean_company}")
         
-        # First phase - specific searches
-        search_queries = [
-            f"{clean_company} contact email",
-            f"{clean_company} kontakt email",
-            f"{clean_company} impressum",
-            f"{clean_company} about us",
-            f"site:{clean_company.lower().replace(' ', '')}.com contact",
-            f"site:{clean_company.lower().replace(' ', '')}.de contact"
-        ]
+        # Probe guessed company domains directly; an acceptable hit skips all search traffic
+        candidates = CandidatePool(clean_company)
+        candidates.tag = 'domain_probe'
+        with metrics.stage('probe'):
+            hits = probe_company_domains(clean_company, target_country, probe_head, fetch_page,
+                                         extract=extract_response_emails, scheme=PROBE_SCHEME)
+        record_query(target_country, 'domain_probe')
+        for email, url, from_html in hits:
+            candidates.add(email, url, source_type='probe', from_html=from_html)
+        if candidates.is_acceptable():
+            print(f"Email found by domain probe: {candidates.best_email()}")
+            return accept_candidate(candidates, target_country)
+        
+        # First phase - specific searches, ordered by their past hit rate for this country
+        for template_id, search_query in plan_queries(clean_company, target_country, 1):
+            deadline.check()
+            candidates.tag = template_id
+            record_query(target_country, template_id)
+            try_search_query(search_query, clean_company, candidates)
+            if candidates.is_acceptable():
+                return accept_candidate(candidates, target_country)
         
-        # First attempt to find email
-        for search_query in search_queries:
-            email = try_search_query(search_query)
-            if email:
-                return email
+        # Weaker candidates from the specific searches still beat a general search
+        if candidates.best_email():
+            return accept_candidate(candidates, target_country)
         
         # Second phase - general email search
         print("No email found in first phase, performing general search...")
-        general_queries = [
-            f"{clean_company} email",
-            f"{clean_company} mail",
-            f"{clean_company} info@",
-            f"{clean_company} contact@"
-        ]
-        
-        for search_query in general_queries:
+        stop_when = company_email_detector(clean_company)
+        accept = company_email_filter(clean_company)
+        for template_id, search_query in plan_queries(clean_company, target_country, 2):
+            deadline.check()
+            candidates.tag = template_id
+            record_query(target_country, template_id)
             # Check more results
-            search_results = search(search_query, 
-                                  num=5,  # Increased number of results
-                                  stop=5, 
-                                  pause=2.0,
-                                  lang='en')
+            search_results = search_with_retry(search_query, num=5)
             
             for url in search_results:
                 if any(skip_domain in url.lower() for skip_domain in [
@@ -153,86 +339,129 @@ def scrape_company_email(company):
                     continue  # Skip social media sites
                     
                 try:
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
-                    response = requests.get(url, timeout=10, headers=headers)
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract email from HTML
-                    html_emails = extract_emails_from_html(soup)
-                    if html_emails:
-                        # Try to find email related to company name
-                        company_name_parts = clean_company.lower().split()
-                        for email in html_emails:
-                            if any(part in email.lower() for part in company_name_parts):
-                                return email
-                        # If no email matches company name, return first found email
-                        return html_emails[0]
-                    
-                    # Text-based search
-                    page_text = soup.get_text()
-                    email = find_email(page_text)
-                    if email:
-                        return email
-                        
+                    scan_url(url, candidates, stop_when, accept)
+                    if candidates.is_confident():
+                        return accept_candidate(candidates, target_country)
+                except DeadlineExceeded:
+                    raise
+                except HostThrottled as e:
+                    print(f"Skipping URL: {str(e)}")
+                    continue
                 except Exception as e:
                     print(f"URL scanning error: {str(e)}")
                     continue
+            
+            if candidates.is_acceptable():
+                return accept_candidate(candidates, target_country)
         
-        return None
+        return accept_candidate(candidates, target_country)
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Search error: {str(e)}")
         return None
 
-def try_search_query(search_query):
-    """Search for email with a single query"""
+def plan_queries(clean_company, target_country, phase):
+    """Query templates for a phase, reordered and pruned by the query planner"""
+    if query_planner is None:
+        slug = clean_company.lower().replace(' ', '')
+        return [(template_id, query.format(name=clean_company, slug=slug))
+                for template_id, template_phase, query in QUERY_TEMPLATES if template_phase == phase]
+    return query_planner.plan(clean_company, target_country, phase)
+
+def record_query(target_country, template_id):
+    if query_planner is not None:
+        query_planner.record_try(target_country, template_id)
+
+def accept_candidate(candidates, target_country):
+    """Returns the best candidate and credits the query template that found it"""
+    email = candidates.best_email()
+    if email and query_planner is not None:
+        tags = candidates.tags(email)
+        if tags:
+            query_planner.record_hit(target_country, tags[0])
+    return email
+
+def scan_url(url, candidates, stop_when=None, accept=None):
+    """Adds every address on a result page to the candidate pool, following the
+    site's contact/impressum links when the page has no company address. A company
+    site already scanned for another company is answered from the domain memo."""
+    deadline.check()
+    domain = registered_domain(url)
+    site_page = domain_memo is not None and is_site_page(url)
+    if site_page and domain not in candidates.domains:
+        known = domain_memo.get(domain)
+        if known is not None:
+            metrics.count('domain_memo_hits')
+            print(f"Domain memo hit for {domain}: {len(known)} known address(es)")
+            for email, (source_url, source_type, from_html) in known.items():
+                candidates.add(email, source_url, source_type, from_html)
+            return
+    candidates.domains.add(domain)
+    
+    response = fetch_page(url, stop_when)
+    html_emails, text_emails = extract_response_emails(response.content, response.encoding)
+    candidates.add_page(url, html_emails, text_emails)
+    found = [(email, url, None, True) for email in html_emails] + \
+            [(email, url, None, False) for email in text_emails]
+    own = own_addresses(domain, found)
+    # Only an address of the company itself ends the scan; a web agency's or
+    # hoster's address on the page still sends us to the contact links
+    if accept is None or any(accept(email, url) for email, _, _, _ in found):
+        if domain_memo is not None and own:
+            domain_memo.record(domain, own)
+        return
+    
+    # Follow the site's own contact/impressum links before the next search
+    with metrics.stage('crawl'):
+        email, complete = crawl_site(response, fetch_page, accept,
+                                     time_budget=min(CRAWL_TIME_BUDGET, deadline.remaining(CRAWL_TIME_BUDGET)),
+                                     extract=extract_response_emails)
+    if email:
+        candidates.add(email, url, source_type='contact')
+    if domain_memo is not None:
+        own += own_addresses(domain, [(email, url, 'contact', False)] if email else [])
+        # Only a company page that loaded and a crawl that fetched every link in
+        # time prove the site has no address of its own; a timeout, throttled
+        # host or error page must not hide the domain from the company's retry
+        proven_empty = site_page and complete and 200 <= response.status_code < 300
+        if own or proven_empty:
+            domain_memo.record(domain, own)
+
+def try_search_query(search_query, clean_company='', candidates=None):
+    """Search for email with a single query; returns the best address once the
+    candidate pool is confident"""
     print(f"Trying query: {search_query}")
-    try:
-        # Error handling and retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                search_results = search(search_query, num=3, stop=3, pause=2.0, lang='en')
-                # Convert generator to list to catch errors immediately
-                urls = list(search_results)
-                break
-            except Exception as e:
-                if "429" in str(e):  # Rate limit error
-                    print(f"{Fore.YELLOW}⚠️ Google query limit exceeded. Waiting 60 seconds...{Style.RESET_ALL}")
-                    time.sleep(60)
-                    if attempt == max_retries - 1:
-                        raise
-                else:
-                    raise
+    if candidates is None:
+        candidates = CandidatePool(clean_company)
+    with metrics.stage('query'):
+        try:
+            urls = search_with_retry(search_query, num=3)
         
-        for url in urls:
-            print(f"Scanning URL: {url}")
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                response = requests.get(url, timeout=10, headers=headers)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                html_emails = extract_emails_from_html(soup)
-                if html_emails:
-                    return html_emails[0]
-                
-                page_text = soup.get_text()
-                email = find_email(page_text)
-                if email:
-                    return email
-                    
-            except Exception as e:
-                print(f"URL scanning error: {str(e)}")
-                continue
+            stop_when = company_email_detector(clean_company)
+            accept = company_email_filter(clean_company)
+            for url in urls:
+                print(f"Scanning URL: {url}")
+                try:
+                    scan_url(url, candidates, stop_when, accept)
+                    if candidates.is_confident():
+                        return candidates.best_email()
+                except DeadlineExceeded:
+                    raise
+                except HostThrottled as e:
+                    print(f"Skipping URL: {str(e)}")
+                    continue
+                except Exception as e:
+                    print(f"URL scanning error: {str(e)}")
+                    continue
                 
-        return None
-    except Exception as e:
-        print(f"{Fore.RED}Query error: {str(e)}{Style.RESET_ALL}")
-        return None
+            return None
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"{Fore.RED}Query error: {str(e)}{Style.RESET_ALL}")
+            return None
 
 def get_source_file():
     print(f"{Fore.CYAN}Files in current directory:{Style.RESET_ALL}")
@@ -258,9 +487,125 @@ def get_source_file():
         except ValueError:
             print(f"{Fore.RED}Please enter a valid number!{Style.RESET_ALL}")
 
+def get_worker_count():
+    choice = input(f"{Fore.CYAN}How many companies should be processed in parallel? "
+                   f"(Enter for {MAX_WORKERS}): {Style.RESET_ALL}").strip()
+    if not choice:
+        return MAX_WORKERS
+    try:
+        return max(1, int(choice))
+    except ValueError:
+        print(f"{Fore.YELLOW}Invalid number, using {MAX_WORKERS} workers.{Style.RESET_ALL}")
+        return MAX_WORKERS
+
+def process_company(index, company, total_companies, target_country, skipped_companies,
+                    source_file):
+    """Searches one company (line `index` of source_file) and records the
+    outcome; safe to run from worker threads"""
+    if not company or company.isspace():  # Check for empty or whitespace-only lines
+        print(f"{Fore.YELLOW}⚠️ Skipped empty line (line {index}){Style.RESET_ALL}")
+        skipped_companies.append((index, company, "Empty line"))
+        save_progress(source_file, index, company, "Empty line")
+        return
+    
+    try:
+        print("\n" + "="*50)
+        print(f"{Fore.CYAN}📋 Company {index}/{total_companies} - {company}{Style.RESET_ALL}")
+        print("="*50)
+        
+        # Şirket (veya yazımı farklı aynı şirket) daha önce aranmış mı kontrol et
+        duplicate_of = company_index.claim(company)
+        if duplicate_of:
+            print(f"{Fore.YELLOW}⚠️ This company has already been searched as '{duplicate_of}'. "
+                  f"Skipping...{Style.RESET_ALL}")
+            save_progress(source_file, index, company, "Already searched")
+            return
+        
+        # Şirket adı geçerlilik kontrolü
+        if len(company) < 2:  # Check for very short company names
+            print(f"{Fore.YELLOW}⚠️ Invalid company name: '{company}'{Style.RESET_ALL}")
+            status = "Invalid company name"
+            skipped_companies.append((index, company, status))
+            save_result(company, "-", status, target_country)
+            save_progress(source_file, index, company, status)
+            return
+        
+        started = time.perf_counter()
+        try:
+            with deadline.activate(Deadline(COMPANY_TIME_BUDGET)), metrics.stage('company'):
+                email = scrape_company_email(company, target_country)
+        except DeadlineExceeded as timeout_error:
+            print(f"{Fore.YELLOW}⏱️ {DEADLINE_STATUS} ({timeout_error}); will be retried next run{Style.RESET_ALL}")
+            skipped_companies.append((index, company, DEADLINE_STATUS))
+            # The line stays open in the checkpoint journal so the next run retries it
+            save_result(company, "-", DEADLINE_STATUS, target_country, time.perf_counter() - started)
+            return
+        except Exception as scrape_error:
+            error_msg = str(scrape_error)
+            print(f"{Fore.RED}Email search error: {error_msg}{Style.RESET_ALL}")
+            status = f"Email search error: {error_msg}"
+            skipped_companies.append((index, company, status))
+            email = "-"
+            save_result(company, email, status, target_country, time.perf_counter() - started)
+            save_progress(source_file, index, company, status)
+            return
+        
+        if email:
+            print(f"{Fore.GREEN}✅ Email found: {email}{Style.RESET_ALL}")
+            status = "Email found"
+        else:
+            print(f"{Fore.RED}❌ Email not found{Style.RESET_ALL}")
+            status = "Email not found"
+            email = "-"
+        
+        try:
+            save_result(company, email, status, target_country, time.perf_counter() - started)
+            save_progress(source_file, index, company, status)
+        except Exception as save_error:
+            print(f"{Fore.RED}Error saving: {str(save_error)}{Style.RESET_ALL}")
+        
+    except Exception as e:
+        error_msg = str(e)
+        print(f"{Fore.RED}Unexpected error: {error_msg}{Style.RESET_ALL}")
+        print(f"{Fore.RED}Error details:{Style.RESET_ALL}")
+        import traceback
+        print(traceback.format_exc())
+        
+        status = f"Critical error: {error_msg}"
+        skipped_companies.append((index, company, status))
+        
+        try:
+            save_result(company, "-", status, target_country)
+            save_progress(source_file, index, company, status)
+        except:
+            print(f"{Fore.RED}Error saving failed!{Style.RESET_ALL}")
+
+def setup_pipeline(backend=None):
+    """Opens the stores, caches, HTTP client, parse pool and search backend
+    used by process_company; `backend` replaces the configured search backend"""
+    global results_store, page_cache, search_backend, http_client, probe_client, query_planner, parse_pool, \
+        checkpoints, company_index, domain_memo
+    results_store = open_results_store()
+    page_cache = PageCache()
+    query_planner = QueryPlanner()
+    checkpoints = CheckpointJournal()
+    company_index = open_company_index(results_store, exclude_statuses=(DEADLINE_STATUS,))
+    domain_memo = DomainMemo()
+    # I/O threads only download; parsing runs in PARSE_PROCESSES worker processes
+    if PARSE_PROCESSES > 1:
+        parse_pool = ParsePool(PARSE_PROCESSES)
+    http_client = FetchClient(pool_connections=POOL_HOSTS, pool_maxsize=MAX_REQUESTS_PER_HOST,
+                              retries=FETCH_RETRIES, backoff_factor=FETCH_BACKOFF,
+                              headers=REQUEST_HEADERS)
+    probe_client = FetchClient(pool_connections=POOL_HOSTS, pool_maxsize=MAX_REQUESTS_PER_HOST,
+                               retries=0, headers=REQUEST_HEADERS)
+    search_backend = backend or create_search_backend(SEARCH_BACKEND, SEARCH_FIXTURE_FILE,
+                                                      host_limiter=host_limiter, rate_limiter=rate_limiter)
+
 def main():
     # Colorama'yı başlat
     init()
+    setup_pipeline()
     
     try:
         # Kaynak dosyayı seç
@@ -270,12 +615,6 @@ def main():
         target_country = os.path.splitext(os.path.basename(source_file))[0].capitalize()
         print(f"\n{Fore.GREEN}Target Country: {target_country}{Style.RESET_ALL}")
         
-        # Excel dosyasını kontrol et
-        existing_companies = set()
-        if os.path.exists('email_results.xlsx'):
-            df = pd.read_excel('email_results.xlsx')
-            existing_companies = set(df['Company'].tolist())
-        
         # Seçilen dosyadan şirket listesini oku
         try:
             with open(source_file, 'r', encoding='utf-8') as f:
@@ -291,91 +630,76 @@ def main():
                 except UnicodeDecodeError:
                     continue
         
-        # Son kaldığımız yeri kontrol et
-        last_company = load_progress()
-        if last_company:
-            try:
-                start_index = companies.index(last_company) + 1
-            except ValueError:
-                print(f"{Fore.YELLOW}Warning: Last processed company not found in list. Starting from beginning.{Style.RESET_ALL}")
-                start_index = 0
-        else:
-            start_index = 0
-        
-        total_companies = len(companies[start_index:])
+        # Son kaldığımız yeri kontrol et: tamamlanmamış satırlar checkpoint günlüğünden
+        imported = checkpoints.import_legacy_progress(source_file, companies)
+        if imported:
+            print(f"{Fore.YELLOW}Imported progress.txt: first {imported} lines marked as done.{Style.RESET_ALL}")
+        items = checkpoints.remaining(source_file, companies)
+        total_companies = len(companies)
+        print(f"{Fore.CYAN}{len(items)} of {total_companies} lines left to process.{Style.RESET_ALL}")
         
         skipped_companies = []  # List to track skipped companies
         
-        for index, company in enumerate(companies[start_index:], 1):
-            if not company or company.isspace():  # Check for empty or whitespace-only lines
-                print(f"{Fore.YELLOW}⚠️ Skipped empty line (line {index}){Style.RESET_ALL}")
-                skipped_companies.append((index, company, "Empty line"))
-                continue
-            
+        workers = get_worker_count()
+        start_hedge_pool(workers)
+        start_time = time.time()
+        
+        if workers > 1:
+            # Keep several companies in flight; per-host caps still apply inside fetches
+            executor = ThreadPoolExecutor(max_workers=workers)
             try:
-                print("\n" + "="*50)
-                print(f"{Fore.CYAN}📋 Company {index}/{total_companies} - {company}{Style.RESET_ALL}")
-                print("="*50)
-                
-                # Şirket daha önce aranmış mı kontrol et
-                if company in existing_companies:
-                    print(f"{Fore.YELLOW}⚠️ This company has already been searched. Skipping...{Style.RESET_ALL}")
-                    continue
-                
-                # Şirket adı geçerlilik kontrolü
-                if len(company) < 2:  # Check for very short company names
-                    print(f"{Fore.YELLOW}⚠️ Invalid company name: '{company}'{Style.RESET_ALL}")
-                    status = "Invalid company name"
-                    skipped_companies.append((index, company, status))
-                    update_excel(company, "-", status, target_country)
-                    save_progress(company)
-                    continue
-                
-                try:
-                    email = scrape_company_email(company)
-                except Exception as scrape_error:
-                    error_msg = str(scrape_error)
-                    print(f"{Fore.RED}Email search error: {error_msg}{Style.RESET_ALL}")
-                    status = f"Email search error: {error_msg}"
-                    skipped_companies.append((index, company, status))
-                    email = "-"
-                    update_excel(company, email, status, target_country)
-                    save_progress(company)
-                    time.sleep(2)
-                    continue
-                
-                if email:
-                    print(f"{Fore.GREEN}✅ Email found: {email}{Style.RESET_ALL}")
-                    status = "Email found"
-                else:
-                    print(f"{Fore.RED}❌ Email not found{Style.RESET_ALL}")
-                    status = "Email not found"
-                    email = "-"
-                
-                try:
-                    update_excel(company, email, status, target_country)
-                    save_progress(company)
-                except Exception as save_error:
-                    print(f"{Fore.RED}Error saving: {str(save_error)}{Style.RESET_ALL}")
-                
-            except Exception as e:
-                error_msg = str(e)
-                print(f"{Fore.RED}Unexpected error: {error_msg}{Style.RESET_ALL}")
-                print(f"{Fore.RED}Error details:{Style.RESET_ALL}")
-                import traceback
-                print(traceback.format_exc())
-                
-                status = f"Critical error: {error_msg}"
-                skipped_companies.append((index, company, status))
-                
-                try:
-                    update_excel(company, "-", status, target_country)
-                    save_progress(company)
-                except:
-                    print(f"{Fore.RED}Error saving failed!{Style.RESET_ALL}")
-            
-            finally:
-                time.sleep(2)
+                futures = [
+                    executor.submit(process_company, index, company, total_companies,
+                                    target_country, skipped_companies, source_file)
+                    for index, company in items
+                ]
+                for done_count, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if done_count % METRICS_EVERY == 0:
+                        metrics.write_prometheus(METRICS_PROM)
+            except KeyboardInterrupt:
+                # Ctrl+C: drop queued companies; the ones in flight finish and are journaled
+                print(f"\n{Fore.YELLOW}Stopping: cancelling queued companies, waiting for "
+                      f"{workers} running ones...{Style.RESET_ALL}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown(wait=True)
+        else:
+            for index, company in items:
+                process_company(index, company, total_companies,
+                                target_country, skipped_companies, source_file)
+        
+        elapsed_minutes = max(time.time() - start_time, 1e-6) / 60
+        print(f"\n{Fore.CYAN}Throughput: {len(items) / elapsed_minutes:.1f} companies/minute "
+              f"({workers} worker(s)){Style.RESET_ALL}")
+        cache_stats = page_cache.stats()
+        print(f"{Fore.CYAN}Page cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, "
+              f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate){Style.RESET_ALL}")
+        memo_stats = domain_memo.stats()
+        print(f"{Fore.CYAN}Domain memo: {memo_stats['hits']} hits, {memo_stats['negative_hits']} negative hits, "
+              f"{memo_stats['misses']} misses ({memo_stats['hit_rate']:.0%} hit rate){Style.RESET_ALL}")
+        http_stats = http_client.stats()
+        print(f"{Fore.CYAN}HTTP: {http_stats['requests']} requests, {http_stats['connections_opened']} connections opened, "
+              f"{http_stats['connections_reused']} reused ({http_stats['reuse_rate']:.0%}), "
+              f"DNS cache {http_stats['dns_hits']} hits / {http_stats['dns_misses']} misses{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Rate limiter state:{Style.RESET_ALL}")
+        print_state(rate_limiter)
+        print(f"{Fore.CYAN}Query template hit rates for {target_country}:{Style.RESET_ALL}")
+        print_stats(query_planner, target_country)
+        if search_backend is not None:
+            search_stats = search_backend.stats()
+            print(f"{Fore.CYAN}Search cache: {search_stats['hits']} hits, {search_stats['misses']} misses "
+                  f"({search_stats['hit_rate']:.0%} hit rate){Style.RESET_ALL}")
+            metrics.gauge('search_cache_hit_rate', search_stats['hit_rate'])
+        metrics.gauge('page_cache_hit_rate', cache_stats['hit_rate'])
+        metrics.gauge('domain_memo_hit_rate', memo_stats['hit_rate'])
+        metrics.gauge('connection_reuse_rate', http_stats['reuse_rate'])
+        metrics.gauge('companies_per_minute', round(len(items) / elapsed_minutes, 2))
+        metrics.log('run', source_file=source_file, companies=len(items), minutes=round(elapsed_minutes, 2),
+                    workers=workers, counters=dict(metrics.counters))
+        metrics.write_prometheus(METRICS_PROM)
+        print(f"{Fore.CYAN}Stage timings:{Style.RESET_ALL}")
+        metrics.print_summary()
         
         # Program sonunda atlanan şirketleri raporla
         if skipped_companies:
@@ -395,6 +719,18 @@ def main():
             except Exception as save_error:
                 print(f"{Fore.RED}Error saving skipped companies: {str(save_error)}{Style.RESET_ALL}")
 
+        try:
+            with metrics.stage('export'):
+                exported = results_store.export(RESULTS_EXCEL)
+            print(f"\n{Fore.GREEN}{exported} results exported to '{RESULTS_EXCEL}'.{Style.RESET_ALL}")
+        except Exception as export_error:
+            print(f"{Fore.RED}Error exporting results: {str(export_error)}{Style.RESET_ALL}")
+
+        if parse_pool is not None:
+            print(f"Pages parsed inline: {parse_pool.inline}, in worker processes: {parse_pool.offloaded}")
+            parse_pool.close()
+
+        metrics.close()
         print(f"\n{Fore.GREEN}✨ All companies processed!{Style.RESET_ALL}")
         print(f"Total skipped/error companies: {len(skipped_companies)}")
 
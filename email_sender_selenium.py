@@ -3,57 +3,65 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
 import time
 import random
 import os
-import json
-from datetime import datetime, timedelta
-from selenium.common.exceptions import TimeoutException, ElementNotInteractableException
-
-# Constants for email tracking system
+from selenium.common.exceptions import TimeoutException, ElementNotInteractableException, \
+    NoSuchElementException, StaleElementReferenceException
+from contextlib import contextmanager
+from results_store import open_results_store
+from send_ledger import SendLedger
+from smtp_sender import SmtpSender
+from message_builder import fill_template
+from metrics import Metrics
+
+# Sends per account and day; counted from the send ledger
 DAILY_EMAIL_LIMIT = 60
-EMAIL_TRACKING_FILE = 'email_tracking.json'
-
-def get_current_date():
-    """Returns current date in YYYY-MM-DD format"""
-    return datetime.now().strftime('%Y-%m-%d')
-
-def load_email_tracking():
-    if os.path.exists(EMAIL_TRACKING_FILE):
-        with open(EMAIL_TRACKING_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_email_tracking(tracking_data):
-    with open(EMAIL_TRACKING_FILE, 'w') as f:
-        json.dump(tracking_data, f, indent=4)
-
-def get_today_sent_count(tracking_data, email):
-    today = get_current_date()
-    if email in tracking_data and today in tracking_data[email]:
-        return tracking_data[email][today]
-    return 0
 
-def update_email_tracking(tracking_data, email):
-    today = get_current_date()
-    if email not in tracking_data:
-        tracking_data[email] = {}
-    if today not in tracking_data[email]:
-        tracking_data[email][today] = 0
-    tracking_data[email][today] += 1
-    save_email_tracking(tracking_data)
-
-def clean_old_tracking_data(tracking_data):
-    today = datetime.strptime(get_current_date(), '%Y-%m-%d')
-    for email in list(tracking_data.keys()):
-        for date_str in list(tracking_data[email].keys()):
-            date = datetime.strptime(date_str, '%Y-%m-%d')
-            if (today - date).days > 7:  # Clean records older than 7 days
-                del tracking_data[email][date_str]
-    save_email_tracking(tracking_data)
-
-def setup_driver(profile_name):
+# UI waits: every step waits for its own readiness condition, never a fixed sleep
+STEP_TIMEOUT = 10
+LOGIN_TIMEOUT = 60
+UPLOAD_TIMEOUT = 60
+SEND_CONFIRM_TIMEOUT = 15
+FILE_DIALOG_DELAY = 1.0
+FILE_INPUT_TIMEOUT = 5
+GMAIL_SIGNIN_URL = 'https://accounts.google.com/ServiceLogin?continue=https://mail.google.com/mail/'
+SENDER_METRICS_LOG = 'sender_metrics.jsonl'
+
+# Selector variants per UI step; the first variant that matches is remembered
+SELECTORS = {
+    'login_email': [(By.CSS_SELECTOR, "input[type='email']")],
+    'login_password': [(By.CSS_SELECTOR, "input[type='password']")],
+    'login_next': [(By.CSS_SELECTOR, "button[jsname='LgbsSe']"), (By.ID, "identifierNext"), (By.ID, "passwordNext")],
+    'compose': [(By.XPATH, "//div[text()='Compose']"), (By.CSS_SELECTOR, ".T-I.T-I-KE.L3")],
+    'to': [(By.CSS_SELECTOR, "input[role='combobox']"), (By.NAME, "to")],
+    'subject': [(By.NAME, "subjectbox"), (By.CSS_SELECTOR, "input[placeholder='Subject']")],
+    'body': [(By.CSS_SELECTOR, "div[role='textbox']"), (By.CSS_SELECTOR, ".Am.Al.editable")],
+    'attach': [(By.CSS_SELECTOR, "div[command='Files']"), (By.CSS_SELECTOR, "div[aria-label='Add attachment']"),
+               (By.CSS_SELECTOR, "div[aria-label='Attach files']")],
+    'send': [(By.CSS_SELECTOR, "div[role='button'][aria-label*='Send']"),
+             (By.CSS_SELECTOR, ".T-I.J-J5-Ji.aoO.v7.T-I-atl.L3")],
+    # Gmail keeps a hidden file input next to the compose window
+    'file_input': [(By.CSS_SELECTOR, "div[role='dialog'] input[type='file']"),
+                   (By.CSS_SELECTOR, "input[type='file'][name='Filedata']"),
+                   (By.CSS_SELECTOR, "input[type='file']")],
+    'sent_toast': [(By.XPATH, "//span[contains(., 'Message sent')]"), (By.CSS_SELECTOR, "span.bAq")],
+    'send_error': [(By.CSS_SELECTOR, "div[role='alertdialog']")],
+}
+_selector_cache = {}
+sender_metrics = Metrics(log_path=SENDER_METRICS_LOG)
+
+def get_send_method():
+    """Asks whether to send through Gmail in Chrome or over SMTP"""
+    print("Sending method:")
+    print("1. Gmail in Chrome (browser automation)")
+    print("2. SMTP with an app password")
+    choice = input("Select method (Enter for 1): ").strip()
+    return 'smtp' if choice == '2' else 'browser'
+
+def setup_driver(profile_name, headless=False):
+    """Starts Chrome with the account's own profile; headless needs no display,
+    so several senders can run side by side or in a container"""
     options = Options()
     
     # Create separate profile directory for each account
@@ -73,7 +81,11 @@ def setup_driver(profile_name):
     
     # Set Chrome profile
     options.add_argument(f'--user-data-dir={user_data_dir}')
-    options.add_argument('--start-maximized')
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+    else:
+        options.add_argument('--start-maximized')
     
     # Hide Chrome's automation mode
     options.add_argument("--disable-blink-features")
@@ -86,11 +98,76 @@ def setup_driver(profile_name):
     
     return driver
 
+@contextmanager
+def timed_step(timings, name):
+    """Records how long one UI step took, for the per-email log and the run summary"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        timings[name] = seconds
+        sender_metrics.observe(name, seconds)
+
+def find_step_element(driver, step, condition=EC.visibility_of_element_located, timeout=STEP_TIMEOUT):
+    """Waits until any selector variant of a step matches, polling all variants
+    at once; the variant that matched is tried first on later sends"""
+    cached = _selector_cache.get(step)
+    variants = [cached] + [locator for locator in SELECTORS[step] if locator != cached] if cached else SELECTORS[step]
+
+    def any_variant(driver):
+        for locator in variants:
+            try:
+                element = condition(locator)(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                element = False
+            if element:
+                _selector_cache[step] = locator
+                return element
+        return False
+
+    return WebDriverWait(driver, timeout).until(any_variant)
+
+def xpath_literal(value):
+    return f'"{value}"' if "'" in value else f"'{value}'"
+
+def wait_for_attachment(driver, file_name, timeout=UPLOAD_TIMEOUT):
+    """Waits until the attachment chip shows the file and no upload progress bar is left"""
+    chip = (By.XPATH, f"//div[@role='dialog']//*[contains(text(), {xpath_literal(file_name)})]")
+    WebDriverWait(driver, timeout).until(
+        lambda driver: driver.find_elements(*chip) and
+        not driver.find_elements(By.CSS_SELECTOR, "div[role='dialog'] div[role='progressbar']")
+    )
+
+def wait_for_send_result(driver, timeout=SEND_CONFIRM_TIMEOUT):
+    """Returns 'sent' once the "Message sent" toast shows, 'error' for an error
+    dialog, or 'unconfirmed' when neither appears in time"""
+    def outcome(driver):
+        if driver.find_elements(*SELECTORS['send_error'][0]):
+            return 'error'
+        if any(driver.find_elements(*locator) for locator in SELECTORS['sent_toast']):
+            return 'sent'
+        return False
+    try:
+        return WebDriverWait(driver, timeout).until(outcome)
+    except TimeoutException:
+        return 'unconfirmed'
+
+def print_timings(label, timings):
+    total = sum(timings.values())
+    steps = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+    print(f"[*] {label} UI time {total:.2f}s ({steps})")
+
 def gmail_login(driver, email, password):
+    timings = {}
     try:
         print(f"[*] Checking Gmail for {email} account...")
-        driver.get("https://gmail.com")
-        time.sleep(3)
+        with timed_step(timings, 'open_gmail'):
+            driver.get("https://gmail.com")
+            # Either the inbox or the Google sign-in page, whichever the session leads to
+            WebDriverWait(driver, STEP_TIMEOUT).until(
+                lambda driver: "mail.google.com" in driver.current_url or "accounts.google.com" in driver.current_url
+            )
         
         # Check if already on Gmail main page
         if "mail.google.com" in driver.current_url:
@@ -99,173 +176,123 @@ def gmail_login(driver, email, password):
             
         # If not logged in, proceed with normal login
         print(f"[*] Logging into {email} account...")
-        driver.get("https://accounts.google.com/signin")
-        time.sleep(2)
-
-        # Email input
-        email_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email']"))
-        )
-        email_input.send_keys(email)
-        
-        # Next button
-        next_button = driver.find_element(By.CSS_SELECTOR, "button[jsname='LgbsSe']")
-        next_button.click()
-        time.sleep(2)
-
-        # Password input
-        password_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='password']"))
-        )
-        password_input.send_keys(password)
-        
-        # Sign in button
-        sign_in_button = driver.find_element(By.CSS_SELECTOR, "button[jsname='LgbsSe']")
-        sign_in_button.click()
-        time.sleep(5)
-
+        with timed_step(timings, 'email'):
+            driver.get(GMAIL_SIGNIN_URL)
+            email_input = find_step_element(driver, 'login_email')
+            email_input.send_keys(email)
+            find_step_element(driver, 'login_next', EC.element_to_be_clickable).click()
+
+        with timed_step(timings, 'password'):
+            password_input = find_step_element(driver, 'login_password', EC.element_to_be_clickable)
+            password_input.send_keys(password)
+            find_step_element(driver, 'login_next', EC.element_to_be_clickable).click()
+
+        # Two-step verification may need the user, so the inbox gets a longer timeout
+        with timed_step(timings, 'inbox'):
+            WebDriverWait(driver, LOGIN_TIMEOUT).until(EC.url_contains("mail.google.com"))
+        print_timings("Login", timings)
         return True
+    except TimeoutException:
+        print(f"[!] Error during login: Gmail did not open within {LOGIN_TIMEOUT} seconds")
+        return False
     except Exception as e:
         print(f"[!] Error during login: {str(e)}")
         return False
 
-def send_email(driver, recipient, subject, body, cv_path):
+def attach_file(driver, cv_path, allow_file_dialog=True):
+    """Hands the CV straight to the compose window's file input; the native
+    file dialog (pyautogui) is only a fallback when a desktop is available"""
+    path = os.path.abspath(cv_path)
     try:
-        # Go to Gmail and wait for full load
-        if 'gmail.com' not in driver.current_url:
-            driver.get('https://gmail.com')
-            print("[*] Loading Gmail (3 seconds)...")
-            time.sleep(3)
-
-        print("[*] Clicking Compose button...")
-        # Click Compose button
-        try:
-            compose_btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[text()='Compose']"))
-            )
-        except:
-            compose_btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, ".T-I.T-I-KE.L3"))
-            )
-
-        compose_btn.click()
-        print("[*] Opening compose window (2 seconds)...")
-        time.sleep(2)
-
-        print("[*] Writing recipient address...")
-        # Fill recipient field
-        try:
-            to_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[role='combobox']"))
-            )
-        except:
-            to_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "to"))
-            )
-        
-        to_field.send_keys(recipient)
-        print("[*] Recipient written (1 second)...")
-        time.sleep(1)
-
-        print("[*] Writing subject...")
-        # Fill subject field
-        try:
-            subject_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "subjectbox"))
-            )
-        except:
-            subject_field = driver.find_element(By.CSS_SELECTOR, "input[placeholder='Subject']")
-        
-        subject_field.send_keys(subject)
-        print("[*] Subject written (1 second)...")
-        time.sleep(1)
-
-        print("[*] Writing email body...")
-        # Fill message body
-        try:
-            body_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='textbox']"))
-            )
-        except:
-            body_field = driver.find_element(By.CSS_SELECTOR, ".Am.Al.editable")
-        
-        body_field.send_keys(body)
-        print("[*] Email body written (1 second)...")
-        time.sleep(1)
-
-        print("[*] Attaching CV file...")
-        # Attach file
-        try:
-            attach_btn = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[command='Files']"))
-            )
-        except:
-            try:
-                attach_btn = driver.find_element(By.CSS_SELECTOR, "div[aria-label='Add attachment']")
-            except:
-                attach_btn = driver.find_element(By.CSS_SELECTOR, "div[aria-label='Attach files']")
-
-        attach_btn.click()
-        print("[*] Opening file selection window (2 seconds)...")
-        time.sleep(2)
-
-        # Send file path
+        file_input = find_step_element(driver, 'file_input', EC.presence_of_element_located,
+                                       timeout=FILE_INPUT_TIMEOUT)
+    except TimeoutException:
+        if not allow_file_dialog:
+            raise
+        print("[*] No file input found, using the file selection dialog...")
+        find_step_element(driver, 'attach', EC.element_to_be_clickable).click()
+        # The native file dialog has no DOM signal; give it a moment to open
+        time.sleep(FILE_DIALOG_DELAY)
         import pyautogui
-        print(f"[*] Writing CV file path: {cv_path}")
-        pyautogui.write(cv_path)
-        time.sleep(1)
-        print("[*] Loading CV file...")
+        pyautogui.write(path)
         pyautogui.press('enter')
-        print("[*] Completing CV upload (3 seconds)...")
-        time.sleep(3)
-
-        print("[*] Sending email...")
-        # Error checking during email sending
-        try:
-            # Click send button
-            try:
-                send_btn = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "div[role='button'][aria-label*='Send']"))
-                )
-            except:
-                send_btn = driver.find_element(By.CSS_SELECTOR, ".T-I.J-J5-Ji.aoO.v7.T-I-atl.L3")
+        return
+    file_input.send_keys(path)
 
-            send_btn.click()
-            time.sleep(2)
+def send_email(driver, recipient, subject, body, cv_path, allow_file_dialog=True):
+    timings = {}
+    try:
+        with timed_step(timings, 'compose'):
+            # Go to Gmail; the Compose button being clickable means the inbox is ready
+            if 'gmail.com' not in driver.current_url:
+                print("[*] Loading Gmail...")
+                driver.get('https://gmail.com')
+
+            print("[*] Clicking Compose button...")
+            find_step_element(driver, 'compose', EC.element_to_be_clickable).click()
+            # The recipient field showing up means the compose dialog is open
+            to_field = find_step_element(driver, 'to')
+
+        with timed_step(timings, 'fields'):
+            print("[*] Writing recipient, subject and body...")
+            to_field.send_keys(recipient)
+            find_step_element(driver, 'subject').send_keys(subject)
+            find_step_element(driver, 'body').send_keys(body)
 
-            # Check for error pop-up
-            try:
-                error_dialog = WebDriverWait(driver, 3).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='alertdialog']"))
-                )
-                error_text = error_dialog.text
-                print(f"[!] Error sending email: {error_text}")
-                return False
-            except TimeoutException:
-                # No error dialog found, email sent successfully
-                print("[+] Email sent successfully!")
-                return True
+        print("[*] Attaching CV file...")
+        with timed_step(timings, 'attach'):
+            print(f"[*] Uploading CV file: {cv_path}")
+            attach_file(driver, cv_path, allow_file_dialog)
+            print("[*] Waiting for CV upload to finish...")
+            wait_for_attachment(driver, os.path.basename(cv_path))
 
-        except Exception as e:
-            print(f"[!] Error clicking send button: {str(e)}")
+        print("[*] Sending email...")
+        with timed_step(timings, 'send'):
+            find_step_element(driver, 'send', EC.element_to_be_clickable).click()
+            result = wait_for_send_result(driver)
+        print_timings("Email", timings)
+        sender_metrics.log('send', recipient=recipient, result=result,
+                           steps={name: round(seconds, 3) for name, seconds in timings.items()})
+
+        if result == 'error':
+            error_text = driver.find_element(*SELECTORS['send_error'][0]).text
+            print(f"[!] Error sending email: {error_text}")
             return False
+        if result == 'unconfirmed':
+            print("[*] No 'Message sent' confirmation seen, but no error either")
+        print("[+] Email sent successfully!")
+        return True
 
+    except TimeoutException:
+        step = next(reversed(timings), 'compose')
+        print(f"[!] Error sending email: page not ready after {STEP_TIMEOUT}s ({step} step)")
+        return False
     except Exception as e:
         print(f"[!] Error sending email: {str(e)}")
         return False
 
 def main():
+    driver = None
+    sender = None
+    ledger = None
     try:
-        # Load email tracking data
-        tracking_data = load_email_tracking()
-        clean_old_tracking_data(tracking_data)
-
-        # Load email list from Excel
-        df = pd.read_excel('email_results.xlsx')
+        # Results not yet emailed: the scraper's results minus the send ledger
+        results_store = open_results_store()
+        results_store.close()
+        ledger = SendLedger(results_store.path)
+        imported = ledger.import_legacy_tracking()
+        if imported:
+            print(f"[*] Imported today's {imported} sends from email_tracking.json into the send ledger")
+        queue = ledger.queue()
+        print(f"[*] {len(queue)} addresses not emailed yet")
         
         # Get Gmail credentials
         email = input("Enter Gmail address: ")
-        password = input("Enter Gmail password: ")
+        method = get_send_method()
+        if method == 'smtp':
+            password = input("Enter Gmail app password: ")
+        else:
+            password = input("Enter Gmail password: ")
         
         # Get CV file path
         cv_path = input("Enter full path to CV file: ")
@@ -274,6 +301,7 @@ def main():
             return
         
         # Get email subject and body
+        print("Subject and body may use fields from the results, e.g. {Company} or {Target Country}")
         subject = input("Enter email subject: ")
         print("Enter email body (press Ctrl+Z and Enter when done):")
         body = ""
@@ -284,37 +312,49 @@ def main():
         except EOFError:
             pass
 
-        # Setup Chrome driver
-        driver = setup_driver(email)
-
-        # Login to Gmail
-        if not gmail_login(driver, email, password):
-            print("[!] Gmail login failed!")
-            driver.quit()
-            return
-
         # Check daily email limit
-        today_sent = get_today_sent_count(tracking_data, email)
+        today_sent = ledger.sent_today(email)
         if today_sent >= DAILY_EMAIL_LIMIT:
             print(f"[!] Daily email limit ({DAILY_EMAIL_LIMIT}) reached for {email}")
-            driver.quit()
             return
 
+        if method == 'smtp':
+            # One authenticated connection is reused for every email
+            sender = SmtpSender(email, password)
+            try:
+                sender.connect()
+            except Exception as e:
+                print(f"[!] SMTP login failed: {str(e)}")
+                return
+            send = sender.send_email
+        else:
+            # Setup Chrome driver
+            headless = input("Run Chrome headless (no window)? (y/N): ").strip().lower() == 'y'
+            if headless:
+                print("[*] Headless mode: log in once with a visible window if this profile has no Gmail session yet")
+            driver = setup_driver(email, headless)
+
+            # Login to Gmail
+            if not gmail_login(driver, email, password):
+                print("[!] Gmail login failed!")
+                return
+
+            def send(recipient, subject, body, cv_path, fields=None):
+                return send_email(driver, recipient, fill_template(subject, fields), fill_template(body, fields),
+                                  cv_path, allow_file_dialog=not headless)
+
         # Process each email in the list
         success_count = 0
         error_count = 0
         
-        for index, row in df.iterrows():
-            recipient = row['Email']
+        for row in queue:
+            recipient = row['Email'].strip()
             company = row['Company']
-            
-            if recipient == '-' or pd.isna(recipient):
-                continue
                 
             print(f"\n[*] Processing {company} ({recipient})")
             
             # Check if we've hit the daily limit
-            if get_today_sent_count(tracking_data, email) >= DAILY_EMAIL_LIMIT:
+            if ledger.sent_today(email) >= DAILY_EMAIL_LIMIT:
                 print(f"[!] Daily email limit ({DAILY_EMAIL_LIMIT}) reached")
                 break
                 
@@ -323,21 +363,31 @@ def main():
             print(f"[*] Waiting {delay:.1f} seconds before sending next email...")
             time.sleep(delay)
             
-            if send_email(driver, recipient, subject, body, cv_path):
+            fields = {column: value for column, value in row.items() if value is not None}
+            if send(recipient, subject, body, cv_path, fields):
                 success_count += 1
-                update_email_tracking(tracking_data, email)
+                ledger.record(recipient, email, company, 'sent')
             else:
                 error_count += 1
+                ledger.record(recipient, email, company, 'failed')
                 
             print(f"[*] Progress: {success_count} sent, {error_count} failed")
             
         print(f"\n[+] Email sending completed!")
         print(f"[+] Total sent: {success_count}")
         print(f"[+] Total failed: {error_count}")
+        if sender_metrics.stages:
+            print("[*] UI step timings:")
+            sender_metrics.print_summary()
         
     except Exception as e:
         print(f"[!] Critical error: {str(e)}")
     finally:
+        sender_metrics.close()
+        if ledger is not None:
+            ledger.close()
+        if sender is not None:
+            sender.close()
         try:
             driver.quit()
         except:
@@ -0,0 +1,78 @@
+import re
+from bs4 import BeautifulSoup
+from email_extractor import extract_emails
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optional; BeautifulSoup stays the fallback parser
+    lxml_html = None
+
+# Byte-level hints that a page may contain an address at all
+_EMAIL_HINT = re.compile(rb'@|&#0*64;|&#x0*40;|&commat;|[\[\(\{]\s*at\s*[\]\)\}]', re.IGNORECASE)
+_MAILTO = re.compile(rb'mailto:\s*([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})', re.IGNORECASE)
+CONTACT_CLASS_HINTS = ('contact', 'email', 'impressum')
+
+def has_email_hint(content):
+    """Cheap byte scan: False means the page cannot contain an address"""
+    return bool(content) and _EMAIL_HINT.search(content) is not None
+
+def _is_contact_class(value):
+    return bool(value) and any(hint in value.lower() for hint in CONTACT_CLASS_HINTS)
+
+def extract_emails_from_html(soup):
+    emails = set()
+
+    # Collect emails from links
+    for link in soup.find_all('a'):
+        href = link.get('href', '')
+        if 'mailto:' in href:
+            email = href.replace('mailto:', '').strip()
+            emails.add(email)
+
+    # Check elements with specific classes and IDs
+    contact_elements = soup.find_all(class_=_is_contact_class)
+    for element in contact_elements:
+        emails.update(extract_emails(element.strings)[:1])
+
+    return list(emails)
+
+def _extract_with_lxml(content):
+    tree = lxml_html.fromstring(content)
+    emails = set()
+    for href in tree.xpath('//a[contains(@href, "mailto:")]/@href'):
+        emails.add(href.split('mailto:', 1)[1].split('?', 1)[0].strip())
+    for element in tree.xpath('//*[@class]'):
+        if _is_contact_class(element.get('class')):
+            emails.update(extract_emails(element.itertext())[:1])
+    return list(emails), extract_emails(tree.itertext())
+
+def _extract_with_soup(content, encoding):
+    soup = BeautifulSoup(content, 'html.parser', from_encoding=encoding)
+    return extract_emails_from_html(soup), extract_emails(soup.strings)
+
+def extract_page_emails(content, encoding=None):
+    """Tiered extraction over a raw response body.
+
+    Returns (html_emails, text_emails): addresses from mailto links and
+    contact elements, and addresses found in the page text. Cheap byte scans
+    answer most pages; only pages whose addresses are hidden behind entities
+    or markup are parsed, with lxml when available and BeautifulSoup otherwise.
+    """
+    if not has_email_hint(content):
+        return [], []
+
+    mailto_emails = list(dict.fromkeys(
+        email.decode('ascii').lower() for email in _MAILTO.findall(content)
+    ))
+    text = content.decode(encoding or 'utf-8', errors='replace')
+    # A mailto link (e.g. the web agency's) must not hide plain or obfuscated addresses
+    raw_emails = [email for email in extract_emails(text) if email not in mailto_emails]
+    if mailto_emails or raw_emails:
+        return mailto_emails, raw_emails
+
+    if lxml_html is not None:
+        try:
+            return _extract_with_lxml(content)
+        except Exception:
+            pass  # Malformed markup: fall back to the forgiving html.parser
+    return _extract_with_soup(content, encoding)
@@ -0,0 +1,144 @@
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DNS_CACHE_TTL = 300  # Seconds a resolved address is reused
+STREAM_CHUNK_SIZE = 16 * 1024
+STREAM_OVERLAP = 512  # Bytes carried between chunks so an address split across them is still seen
+TEXT_CONTENT_TYPES = ('text/html', 'text/plain', 'application/xhtml+xml', 'application/xml', 'text/xml')
+
+class DnsCache:
+    """TTL cache in front of socket.getaddrinfo, shared by every connection"""
+    def __init__(self, ttl=DNS_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._getaddrinfo = None
+
+    def install(self):
+        if self._getaddrinfo is None:
+            self._getaddrinfo = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+
+    def getaddrinfo(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+        result = self._getaddrinfo(*args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now, result)
+        return result
+
+dns_cache = DnsCache()
+
+class FetchClient:
+    """Keep-alive HTTP client with per-host connection pools and retry/backoff.
+
+    Only connection errors and 500/502/504 are retried here. A 429 or 503 is
+    returned at once, without sleeping through Retry-After, so the caller's rate
+    limiter sees it and backs the host off.
+
+    Each thread gets its own Session (cookies and headers are not shared), but
+    all sessions mount the same adapter, so connections to a host are pooled
+    and reused across worker threads.
+    """
+    def __init__(self, pool_connections=100, pool_maxsize=2, retries=2, backoff_factor=0.5,
+                 headers=None, cache_dns=True):
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   max_retries=retry, pool_block=False)
+        self.headers = headers or {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if cache_dns:
+            dns_cache.install()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.requests += 1
+        return self._session().request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def stats(self):
+        pools = self.adapter.poolmanager.pools
+        connections = 0
+        pooled_requests = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+        return {
+            'requests': self.requests,
+            'connections_opened': connections,
+            'connections_reused': max(pooled_requests - connections, 0),
+            'reuse_rate': (pooled_requests - connections) / pooled_requests if pooled_requests else 0.0,
+            'dns_hits': dns_cache.hits,
+            'dns_misses': dns_cache.misses,
+        }
+
+def is_text_response(response):
+    """True when the Content-Type header announces a page worth scanning"""
+    content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    return not content_type or content_type in TEXT_CONTENT_TYPES
+
+def read_body(response, max_bytes, stop_when=None):
+    """Streams a response body, stopping at max_bytes or as soon as
+    stop_when(window) is true for the newest chunk plus a small overlap.
+
+    Returns (content, truncated).
+    """
+    chunks = []
+    size = 0
+    tail = b''
+    truncated = False
+    try:
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+            if stop_when is not None and stop_when(tail + chunk):
+                truncated = True
+                break
+            tail = chunk[-STREAM_OVERLAP:]
+    finally:
+        response.close()
+    return b''.join(chunks)[:max_bytes], truncated
@@ -0,0 +1,76 @@
+import os
+import re
+import uuid
+from email import policy
+from email.header import Header
+from email.mime.application import MIMEApplication
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+
+CRLF = b'\r\n'
+# {Company}, {Target Country}, ... filled from the recipient's results row
+TEMPLATE_FIELD = re.compile(r'\{([A-Za-z][\w ]*)\}')
+
+def fill_template(text, fields=None):
+    """Replaces {Field} placeholders with values from fields; unknown or empty
+    fields are left as they are, so stray braces in a letter are harmless"""
+    if not fields:
+        return text
+    return TEMPLATE_FIELD.sub(lambda match: str(fields.get(match.group(1)) or match.group(0)), text)
+
+def encode_header(value):
+    # Folded with CRLF: smtplib sends the bytes as they are, and a bare LF is rejected
+    return value if value.isascii() else Header(value, 'utf-8').encode(linesep='\r\n')
+
+class MessageTemplate:
+    """Application email whose immutable parts are serialized once per run.
+
+    The CV is read and base64-encoded a single time and kept as ready-made
+    MIME bytes, as is the body when it has no template fields. Rendering a
+    message for a recipient only formats its headers (and the body fields)
+    and joins the cached parts, so per-message cost and memory stay flat
+    across thousands of sends.
+    """
+    def __init__(self, sender, subject, body, cv_path=None):
+        self.sender = sender
+        self.domain = sender.rsplit('@', 1)[-1] if '@' in sender else None
+        self.subject = subject
+        self.body = body
+        self.boundary = f"=============={uuid.uuid4().hex}=="
+        self.has_fields = bool(TEMPLATE_FIELD.search(subject) or TEMPLATE_FIELD.search(body))
+        self._body_part = None if self.has_fields else self._text_part(body)
+        self._attachment_part = self._file_part(cv_path) if cv_path else None
+
+    @staticmethod
+    def _text_part(text):
+        return MIMEText(text, 'plain', 'utf-8').as_bytes(policy=policy.SMTP)
+
+    @staticmethod
+    def _file_part(path):
+        name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            part = MIMEApplication(f.read())
+        # add_header/set_param apply RFC 2231 encoding to names such as "Lebenslauf_Müller.pdf"
+        part.set_param('name', name)
+        part.add_header('Content-Disposition', 'attachment', filename=name)
+        return part.as_bytes(policy=policy.SMTP)
+
+    def render(self, recipient, fields=None):
+        """Returns the complete message for one recipient as bytes ready for SMTP"""
+        subject = fill_template(self.subject, fields)
+        body_part = self._body_part or self._text_part(fill_template(self.body, fields))
+        headers = [
+            f"From: {self.sender}",
+            f"To: {recipient}",
+            f"Subject: {encode_header(subject)}",
+            f"Date: {formatdate(localtime=True)}",
+            f"Message-ID: {make_msgid(domain=self.domain)}",
+            "MIME-Version: 1.0",
+            f'Content-Type: multipart/mixed; boundary="{self.boundary}"',
+        ]
+        delimiter = f"--{self.boundary}".encode('ascii')
+        parts = [CRLF.join(header.encode('utf-8') for header in headers), b'', delimiter, body_part]
+        if self._attachment_part is not None:
+            parts += [delimiter, self._attachment_part]
+        parts.append(f"--{self.boundary}--".encode('ascii'))
+        return CRLF.join(parts) + CRLF
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_LOG = 'scraper_metrics.jsonl'
+METRICS_PROM = 'scraper_metrics.prom'
+# Histogram bucket upper bounds in seconds
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+class Histogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+class Metrics:
+    """Stage timings, event counters, error classes and gauges for one run.
+
+    Stages are timed with `with metrics.stage('fetch'):`; notable events are
+    appended to a JSON-lines log, and the whole state can be written as a
+    Prometheus textfile and printed as a summary table.
+    """
+    def __init__(self, log_path=METRICS_LOG):
+        self.log_path = log_path
+        self.stages = {}
+        self.counters = {}
+        self.errors = {}  # (stage, exception class) -> count
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self._log = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            with self._lock:
+                key = (name, type(e).__name__)
+                self.errors[key] = self.errors.get(key, 0) + 1
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = Histogram()
+            self.stages[name].observe(seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def log(self, event, **fields):
+        """Appends one JSON line ({"ts", "event", ...fields}) to the metrics log"""
+        line = json.dumps(dict(ts=round(time.time(), 3), event=event, **fields), ensure_ascii=False)
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+            self._log.write(line + '\n')
+            self._log.flush()
+
+    def per_found_email(self, name):
+        found = self.counters.get('emails_found', 0)
+        return self.counters.get(name, 0) / found if found else None
+
+    def write_prometheus(self, path=METRICS_PROM):
+        """Writes a node_exporter textfile; replaced atomically so scrapes never see half a file"""
+        lines = ['# TYPE scraper_stage_seconds histogram']
+        with self._lock:
+            for name, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'scraper_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+            lines.append('# TYPE scraper_events_total counter')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'scraper_events_total{{event="{name}"}} {value}')
+            lines.append('# TYPE scraper_errors_total counter')
+            for (name, error), value in sorted(self.errors.items()):
+                lines.append(f'scraper_errors_total{{stage="{name}",error="{error}"}} {value}')
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f'# TYPE scraper_{name} gauge')
+                lines.append(f'scraper_{name} {value}')
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+
+    def print_summary(self):
+        """Prints per-stage timings, search/fetch cost per found email, gauges and error classes"""
+        print(f"{'Stage':<14}{'Count':>8}{'Total':>10}{'Mean':>9}{'p50':>9}{'p95':>9}{'Max':>9}")
+        for name, histogram in sorted(self.stages.items(), key=lambda item: item[1].sum, reverse=True):
+            mean = histogram.sum / histogram.count if histogram.count else 0.0
+            print(f"{name:<14}{histogram.count:>8}{histogram.sum:>9.1f}s{mean:>8.2f}s"
+                  f"{histogram.quantile(0.5):>8.2f}s{histogram.quantile(0.95):>8.2f}s{histogram.max:>8.2f}s")
+        for name in ('queries', 'fetches'):
+            ratio = self.per_found_email(name)
+            if ratio is not None:
+                print(f"{name.capitalize()} per found email: {ratio:.1f}")
+        for name, value in sorted(self.gauges.items()):
+            print(f"{name}: {value:.2%}" if name.endswith('_rate') else f"{name}: {value}")
+        if self.errors:
+            print("Errors by stage:")
+            for (name, error), value in sorted(self.errors.items(), key=lambda item: item[1], reverse=True):
+                print(f"  {name:<12}{error:<30}{value:>6}")
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
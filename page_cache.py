@@ -0,0 +1,147 @@
+import threading
+import time
+from results_store import connect_db
+
+PAGE_CACHE_DB = 'page_cache.db'
+PAGE_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached page must be revalidated
+PAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+class CachedResponse:
+    """Minimal response object served from the cache or built from a fresh download"""
+    def __init__(self, url, status_code, content, encoding=None, content_type='', from_cache=False,
+                 headers=None, truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.content_type = content_type
+        self.from_cache = from_cache
+        self.headers = headers if headers is not None else {'Content-Type': content_type}
+        self.truncated = truncated
+        self.cacheable = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+class PageCache:
+    """Size-bounded LRU cache of fetched pages keyed by URL, with TTL and
+    ETag/Last-Modified revalidation"""
+    def __init__(self, path=PAGE_CACHE_DB, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                status_code INTEGER,
+                content BLOB,
+                encoding TEXT,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                fetched_at REAL,
+                last_access REAL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status_code, content, encoding, content_type, etag, last_modified, fetched_at '
+                'FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+            if row:
+                self._conn.execute('UPDATE pages SET last_access = ? WHERE url = ?', (time.time(), url))
+                self._conn.commit()
+        return row
+
+    def _touch(self, url):
+        with self._lock:
+            now = time.time()
+            self._conn.execute('UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?', (now, now, url))
+            self._conn.commit()
+
+    def _store(self, url, response):
+        content = response.content
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM pages WHERE url = ?', (url,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, response.status_code, content, response.encoding,
+                 response.headers.get('Content-Type', ''), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), size, now, now)
+            )
+            self._total_bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop least recently used pages until the cache fits its size bound
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                'SELECT url, size FROM pages ORDER BY last_access LIMIT 1'
+            ).fetchone()
+            if not row:
+                self._total_bytes = 0
+                break
+            self._conn.execute('DELETE FROM pages WHERE url = ?', (row[0],))
+            self._total_bytes -= row[1]
+            self.evictions += 1
+
+    def fetch(self, url, get):
+        """Returns the page for url, calling get(url, extra_headers) only when the
+        cached copy is missing or stale"""
+        row = self._lookup(url)
+        extra_headers = {}
+        if row:
+            status_code, content, encoding, content_type, etag, last_modified, fetched_at = row
+            cached = CachedResponse(url, status_code, content, encoding, content_type, from_cache=True)
+            if time.time() - fetched_at < self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return cached
+            if etag:
+                extra_headers['If-None-Match'] = etag
+            if last_modified:
+                extra_headers['If-Modified-Since'] = last_modified
+
+        response = get(url, extra_headers)
+        if row and response.status_code == 304:
+            with self._lock:
+                self.revalidated += 1
+            self._touch(url)
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code < 400 and getattr(response, 'cacheable', True):
+            self._store(url, response)
+        return CachedResponse(url, response.status_code, response.content, response.encoding,
+                              response.headers.get('Content-Type', ''))
+
+    def stats(self):
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.revalidated) / lookups if lookups else 0.0,
+            'size_bytes': self._total_bytes,
+        }
@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from html_extractor import extract_page_emails, has_email_hint
+import deadline
+
+PARSE_PROCESSES = os.cpu_count() or 1
+INLINE_BYTES = 32 * 1024  # Smaller pages are cheaper to scan than to ship to another process
+
+class ParsePool:
+    """Runs email extraction in worker processes so parsing scales with cores
+    instead of competing for the GIL with the network threads.
+
+    Raw response bytes are handed over as-is (no str decoding in the I/O
+    thread), and at most max_pending pages are queued at once: I/O workers
+    block on submit when parsing falls behind. A slot is only freed when its
+    worker process is done with the page, even if the caller stopped waiting.
+
+    Workers are spawned rather than forked: they are started from I/O threads,
+    and forking a process that runs many threads can deadlock the child.
+    """
+    def __init__(self, processes=PARSE_PROCESSES, max_pending=None):
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(max_workers=processes,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._pending = threading.BoundedSemaphore(max_pending or 2 * processes)
+        self.inline = 0
+        self.offloaded = 0
+
+    def extract(self, content, encoding=None):
+        """Same contract as html_extractor.extract_page_emails"""
+        if not has_email_hint(content):
+            return [], []
+        if len(content) < INLINE_BYTES:
+            self.inline += 1
+            return extract_page_emails(content, encoding)
+
+        if not self._pending.acquire(timeout=deadline.remaining()):
+            raise deadline.DeadlineExceeded("time budget exceeded while waiting for a parse worker")
+        try:
+            future = self._executor.submit(extract_page_emails, content, encoding)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        self.offloaded += 1
+        try:
+            return future.result(timeout=deadline.remaining())
+        except TimeoutError:
+            future.cancel()
+            raise deadline.DeadlineExceeded("time budget exceeded while parsing a page")
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,103 @@
+import threading
+from results_store import connect_db
+
+QUERY_STATS_DB = 'query_stats.db'
+MIN_TRIALS = 20  # Tries before a template can be skipped for a country
+SKIP_HIT_RATE = 0.02
+
+# (template id, phase, query template); phase 1 scans 3 results, phase 2 scans 5
+QUERY_TEMPLATES = [
+    ('contact_email', 1, "{name} contact email"),
+    ('kontakt_email', 1, "{name} kontakt email"),
+    ('impressum', 1, "{name} impressum"),
+    ('about_us', 1, "{name} about us"),
+    ('site_com', 1, "site:{slug}.com contact"),
+    ('site_de', 1, "site:{slug}.de contact"),
+    ('email', 2, "{name} email"),
+    ('mail', 2, "{name} mail"),
+    ('info_at', 2, "{name} info@"),
+    ('contact_at', 2, "{name} contact@"),
+]
+
+class QueryPlanner:
+    """Orders and prunes search query templates per target country using the
+    recorded share of tries that produced the accepted email"""
+    def __init__(self, path=QUERY_STATS_DB, min_trials=MIN_TRIALS, skip_hit_rate=SKIP_HIT_RATE):
+        self.min_trials = min_trials
+        self.skip_hit_rate = skip_hit_rate
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS template_stats (
+                country TEXT,
+                template TEXT,
+                tries INTEGER DEFAULT 0,
+                hits INTEGER DEFAULT 0,
+                PRIMARY KEY (country, template)
+            )
+        ''')
+        self._conn.commit()
+
+    def _counts(self, country):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT template, tries, hits FROM template_stats WHERE country = ?', (country,)
+            ).fetchall()
+        return {template: (tries, hits) for template, tries, hits in rows}
+
+    def plan(self, clean_company, country, phase):
+        """Returns [(template id, query)] for a phase, best templates first"""
+        counts = self._counts(country)
+        templates = [template for template in QUERY_TEMPLATES if template[1] == phase]
+
+        def hit_rate(template):
+            tries, hits = counts.get(template[0], (0, 0))
+            return (hits + 1) / (tries + 2)  # Laplace smoothing: untried templates start at 0.5
+
+        ordered = sorted(templates, key=hit_rate, reverse=True)
+        kept = [
+            template for template in ordered
+            if counts.get(template[0], (0, 0))[0] < self.min_trials
+            or counts[template[0]][1] / counts[template[0]][0] >= self.skip_hit_rate
+        ]
+        kept = kept or ordered[:1]
+
+        slug = clean_company.lower().replace(' ', '')
+        return [(template_id, query.format(name=clean_company, slug=slug))
+                for template_id, _, query in kept]
+
+    def record_try(self, country, template_id):
+        self._record(country, template_id, 1, 0)
+
+    def record_hit(self, country, template_id):
+        self._record(country, template_id, 0, 1)
+
+    def _record(self, country, template_id, tries, hits):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO template_stats (country, template, tries, hits) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(country, template) DO UPDATE SET tries = tries + excluded.tries, '
+                'hits = hits + excluded.hits',
+                (country, template_id, tries, hits)
+            )
+            self._conn.commit()
+
+    def stats(self, country=None):
+        """Returns [(country, template, tries, hits, hit rate)] sorted by hit rate"""
+        query = 'SELECT country, template, tries, hits FROM template_stats'
+        params = ()
+        if country is not None:
+            query += ' WHERE country = ?'
+            params = (country,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        stats = [(c, t, tries, hits, hits / tries if tries else 0.0) for c, t, tries, hits in rows]
+        return sorted(stats, key=lambda row: (row[0], -row[4]))
+
+def print_stats(planner, country=None):
+    print(f"{'Country':<14}{'Template':<16}{'Tries':>7}{'Hits':>7}{'Hit rate':>10}")
+    for country_name, template, tries, hits, rate in planner.stats(country):
+        print(f"{country_name:<14}{template:<16}{tries:>7}{hits:>7}{rate:>10.1%}")
+
+if __name__ == "__main__":
+    print_stats(QueryPlanner())
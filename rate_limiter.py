@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+HOST_RATE = 2.0  # Requests per second a site starts at
+HOST_MAX_RATE = 5.0
+HOST_MIN_RATE = 0.1
+BASE_BACKOFF = 5.0  # Seconds, doubled on each consecutive throttle
+MAX_BACKOFF = 300.0
+RATE_INCREASE = 0.05  # Added to the rate after every accepted request
+
+class TokenBucket:
+    """Adaptive token bucket: additive increase on success, halving plus an
+    exponential, jittered cooldown when the remote side throttles"""
+    def __init__(self, rate, max_rate, min_rate, capacity=None):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self.failures = 0
+        self.throttled = 0
+        self.requests = 0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait=None):
+        """Blocks until a request may be sent; returns the seconds waited, or
+        None when that would take longer than max_wait"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    self.waited += waited
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            if max_wait is not None and waited + wait > max_wait:
+                return None
+            time.sleep(wait)
+            waited += wait
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+            self.capacity = max(1.0, self.rate)
+
+    def throttle(self, retry_after=None):
+        """Slows the bucket down and returns the cooldown in seconds"""
+        with self._lock:
+            self.failures += 1
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = 0.0
+            if retry_after is not None:
+                cooldown = retry_after
+            else:
+                cooldown = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (self.failures - 1))
+                cooldown *= random.uniform(0.5, 1.5)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + cooldown)
+            return cooldown
+
+    def state(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'tokens': self.tokens,
+                'cooldown': max(0.0, self.blocked_until - time.monotonic()),
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'waited': self.waited,
+            }
+
+class RateLimiter:
+    """Independent token buckets per search backend and per host"""
+    def __init__(self, rate=HOST_RATE, max_rate=HOST_MAX_RATE, min_rate=HOST_MIN_RATE):
+        self.defaults = (rate, max_rate, min_rate)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, key, rate, max_rate, min_rate):
+        with self._lock:
+            self._buckets[key] = TokenBucket(rate, max_rate, min_rate)
+
+    def bucket(self, key):
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(*self.defaults)
+            return self._buckets[key]
+
+    def acquire(self, key, max_wait=None):
+        return self.bucket(key).acquire(max_wait)
+
+    def success(self, key):
+        self.bucket(key).success()
+
+    def throttle(self, key, retry_after=None):
+        bucket = self.bucket(key)
+        cooldown = bucket.throttle(retry_after)
+        print(f"[rate limit] {key} throttled: cooling down {cooldown:.1f}s, rate now {bucket.rate:.2f}/s")
+        return cooldown
+
+    def snapshot(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {key: bucket.state() for key, bucket in buckets.items()}
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def print_state(limiter, limit=10):
+    """Prints the busiest buckets: rate, cooldown, requests, throttles and time waited"""
+    rows = sorted(limiter.snapshot().items(), key=lambda item: item[1]['requests'], reverse=True)
+    print(f"{'Key':<40}{'Rate/s':>8}{'Cooldown':>10}{'Requests':>10}{'Throttled':>11}{'Waited':>9}")
+    for key, state in rows[:limit]:
+        print(f"{key[:39]:<40}{state['rate']:>8.2f}{state['cooldown']:>9.1f}s{state['requests']:>10}"
+              f"{state['throttled']:>11}{state['waited']:>8.1f}s")
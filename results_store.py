@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+
+RESULTS_DB = 'email_results.db'
+RESULTS_EXCEL = 'email_results.xlsx'
+RESULT_COLUMNS = ['Company', 'Email', 'Status', 'Target Country']
+
+def connect_db(path):
+    """Opens a SQLite database shared by worker threads, in WAL mode.
+
+    With WAL and synchronous=NORMAL every commit is an O(1) append to the
+    log and fsyncs are batched at checkpoints, so a crash never leaves a
+    half-written file behind.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+class ResultsStore:
+    """Append-only store for scraper results (Company/Email/Status/Target Country)"""
+    def __init__(self, path=RESULTS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                company TEXT NOT NULL,
+                email TEXT,
+                status TEXT,
+                target_country TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_results_company ON results(company)')
+        self._conn.commit()
+
+    def append(self, company, email, status, target_country, replaces=()):
+        """Adds one result row; earlier rows of the same company and country whose
+        status is in `replaces` (provisional outcomes such as a timeout) are dropped"""
+        with self._lock:
+            if replaces:
+                placeholders = ', '.join('?' for _ in replaces)
+                self._conn.execute(
+                    f'DELETE FROM results WHERE company = ? AND target_country IS ? AND status IN ({placeholders})',
+                    (company, target_country, *replaces)
+                )
+            self._conn.execute(
+                'INSERT INTO results (company, email, status, target_country) VALUES (?, ?, ?, ?)',
+                (company, email, status, target_country)
+            )
+            self._conn.commit()
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM results LIMIT 1').fetchone() is None
+
+    def rows(self, exclude_statuses=()):
+        """(company, email, status, target_country) tuples in insertion order"""
+        placeholders = ', '.join('?' for _ in exclude_statuses)
+        query = 'SELECT company, email, status, target_country FROM results'
+        if exclude_statuses:
+            query += f' WHERE status NOT IN ({placeholders})'
+        with self._lock:
+            return self._conn.execute(query + ' ORDER BY id', tuple(exclude_statuses)).fetchall()
+
+    def load_dataframe(self):
+        return pd.DataFrame(self.rows(), columns=RESULT_COLUMNS)
+
+    def import_excel(self, filename=RESULTS_EXCEL):
+        """One-time migration of an existing results workbook into an empty store"""
+        if not os.path.exists(filename) or not self.is_empty():
+            return 0
+        df = pd.read_excel(filename)
+        rows = [
+            tuple(None if pd.isna(row[column]) else str(row[column]) for column in RESULT_COLUMNS)
+            for _, row in df.iterrows()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO results (company, email, status, target_country) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def export(self, filename=RESULTS_EXCEL):
+        """Writes all results to an .xlsx or .csv file in one pass"""
+        df = self.load_dataframe()
+        if filename.lower().endswith('.csv'):
+            df.to_csv(filename, index=False)
+        else:
+            df.to_excel(filename, index=False)
+        return len(df)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def open_results_store(path=RESULTS_DB):
+    """Opens the store, migrating email_results.xlsx on first use"""
+    store = ResultsStore(path)
+    imported = store.import_excel()
+    if imported:
+        print(f"Imported {imported} rows from {RESULTS_EXCEL} into {path}")
+    return store
+
+if __name__ == "__main__":
+    store = open_results_store()
+    count = store.export()
+    print(f"Exported {count} rows to {RESULTS_EXCEL}")
+    store.close()
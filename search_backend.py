@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from results_store import connect_db
+from rate_limiter import parse_retry_after
+import deadline
+
+SEARCH_CACHE_DB = 'search_cache.db'
+SEARCH_CACHE_TTL = 14 * 24 * 3600  # Seconds before a cached query is searched again
+
+class SearchBackend:
+    """Interface for search providers: search() returns a list of result URLs"""
+    name = 'base'
+
+    def search(self, query, num):
+        raise NotImplementedError
+
+class GoogleSearchBackend(SearchBackend):
+    """Live Google results through the googlesearch package"""
+    name = 'google'
+    host = 'www.google.com'
+    rate_key = 'search:google'
+
+    def __init__(self, pause=2.0, lang='en', host_limiter=None, rate_limiter=None):
+        self.pause = pause
+        self.lang = lang
+        self.host_limiter = host_limiter
+        self.rate_limiter = rate_limiter
+
+    def _search(self, query, num):
+        from googlesearch import search
+        if self.host_limiter is None:
+            return list(search(query, num=num, stop=num, pause=self.pause, lang=self.lang))
+        with self.host_limiter.slot(self.host):
+            return list(search(query, num=num, stop=num, pause=self.pause, lang=self.lang))
+
+    def search(self, query, num):
+        if self.rate_limiter is None:
+            return self._search(query, num)
+        # Never wait past the company deadline, and never send a query for a
+        # company that has already timed out: that only spends Google's budget
+        if self.rate_limiter.acquire(self.rate_key, deadline.remaining()) is None:
+            deadline.check()
+            raise deadline.DeadlineExceeded("search rate limit cooldown exceeds the remaining time budget")
+        deadline.check()
+        try:
+            urls = self._search(query, num)
+        except Exception as e:
+            if "429" in str(e):
+                headers = getattr(e, 'headers', None)
+                retry_after = parse_retry_after(headers.get('Retry-After') if headers else None)
+                self.rate_limiter.throttle(self.rate_key, retry_after)
+            raise
+        self.rate_limiter.success(self.rate_key)
+        return urls
+
+class FixtureSearchBackend(SearchBackend):
+    """Offline results from a JSON file or dict mapping query -> list of URLs"""
+    name = 'fixture'
+
+    def __init__(self, fixtures):
+        if isinstance(fixtures, str):
+            with open(fixtures, 'r', encoding='utf-8') as f:
+                fixtures = json.load(f)
+        self.fixtures = fixtures
+
+    def search(self, query, num):
+        return list(self.fixtures.get(query, []))[:num]
+
+class CachedSearchBackend(SearchBackend):
+    """Persistent query -> URL list cache in front of another backend"""
+    def __init__(self, backend, path=SEARCH_CACHE_DB, ttl=SEARCH_CACHE_TTL):
+        self.backend = backend
+        self.name = f'cached-{backend.name}'
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS searches (
+                backend TEXT,
+                query TEXT,
+                num INTEGER,
+                urls TEXT,
+                searched_at REAL,
+                PRIMARY KEY (backend, query, num)
+            )
+        ''')
+        self._conn.commit()
+
+    def search(self, query, num):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT urls, searched_at FROM searches WHERE backend = ? AND query = ? AND num = ?',
+                (self.backend.name, query, num)
+            ).fetchone()
+            fresh = row is not None and time.time() - row[1] < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if fresh:
+            return json.loads(row[0])
+
+        # Failures propagate uncached so the caller's retry logic still applies
+        urls = self.backend.search(query, num)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)',
+                (self.backend.name, query, num, json.dumps(urls), time.time())
+            )
+            self._conn.commit()
+        return urls
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+def create_search_backend(name='google', fixture_file=None, cache_path=SEARCH_CACHE_DB,
+                          ttl=SEARCH_CACHE_TTL, host_limiter=None, rate_limiter=None):
+    """Builds the named backend behind the persistent query cache"""
+    if name == 'google':
+        # With a rate limiter the token bucket paces queries instead of a fixed pause
+        pause = 0.0 if rate_limiter is not None else 2.0
+        backend = GoogleSearchBackend(pause=pause, host_limiter=host_limiter, rate_limiter=rate_limiter)
+    elif name == 'fixture':
+        backend = FixtureSearchBackend(fixture_file)
+    else:
+        raise ValueError(f"Unknown search backend: {name}")
+    return CachedSearchBackend(backend, cache_path, ttl)
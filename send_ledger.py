@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+from datetime import datetime
+from results_store import connect_db, RESULTS_DB, RESULT_COLUMNS
+
+LEGACY_TRACKING_FILE = 'email_tracking.json'
+
+def normalize_address(address):
+    """Recipients and accounts are stored trimmed and lowercase, so "Foo@gmail.com"
+    and "foo@gmail.com" share one daily count"""
+    return address.strip().lower()
+
+class SendLedger:
+    """Per-recipient record of every application sent (recipient, account,
+    time, outcome), kept next to the results table in the same WAL database.
+
+    The send queue is results minus recipients that already got an email, so
+    a restarted run never mails a company twice, and the daily count per
+    account is an indexed range query instead of a JSON rewrite per send.
+    """
+    def __init__(self, path=RESULTS_DB):
+        self._lock = threading.Lock()
+        self._conn = connect_db(path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS sends (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recipient TEXT NOT NULL,
+                account TEXT NOT NULL,
+                company TEXT,
+                sent_at TEXT NOT NULL,
+                outcome TEXT NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sends_recipient ON sends(recipient, outcome)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sends_account ON sends(account, outcome, sent_at)')
+        # Accounts were stored as typed before they were normalized
+        self._conn.execute('UPDATE sends SET account = lower(trim(account)) WHERE account != lower(trim(account))')
+        self._conn.commit()
+
+    def record(self, recipient, account, company, outcome):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO sends (recipient, account, company, sent_at, outcome) VALUES (?, ?, ?, ?, ?)',
+                (normalize_address(recipient), normalize_address(account), company,
+                 datetime.now().strftime('%Y-%m-%d %H:%M:%S'), outcome)
+            )
+            self._conn.commit()
+
+    def queue(self):
+        """Results rows (Company, Email, Status, Target Country) whose address has
+        not been sent to yet, first row per address, in results order"""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT company, email, status, target_country FROM results
+                WHERE id IN (
+                    SELECT MIN(r.id) FROM results r
+                    WHERE r.email LIKE '%@%'
+                      AND NOT EXISTS (
+                          SELECT 1 FROM sends s WHERE s.recipient = lower(trim(r.email)) AND s.outcome = 'sent'
+                      )
+                    GROUP BY lower(trim(r.email))
+                )
+                ORDER BY id
+            ''').fetchall()
+        return [dict(zip(RESULT_COLUMNS, row)) for row in rows]
+
+    def sent_today(self, account):
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sends WHERE account = ? AND outcome = 'sent' AND sent_at >= ?",
+                (normalize_address(account), today)
+            ).fetchone()[0]
+
+    def import_legacy_tracking(self, tracking_file=LEGACY_TRACKING_FILE):
+        """One-time migration of today's per-account counts from email_tracking.json
+        into an empty ledger, so upgrading mid-day still respects the daily limit.
+        The old file has no recipients; imported rows have an empty one."""
+        if not os.path.exists(tracking_file):
+            return 0
+        with self._lock:
+            if self._conn.execute('SELECT 1 FROM sends LIMIT 1').fetchone() is not None:
+                return 0
+        try:
+            with open(tracking_file, 'r', encoding='utf-8') as f:
+                tracking = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        today = datetime.now().strftime('%Y-%m-%d')
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [('', normalize_address(account), None, now, 'sent')
+                for account, days in tracking.items() for _ in range(int(days.get(today, 0)))]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO sends (recipient, account, company, sent_at, outcome) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,101 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from urllib.parse import urljoin, urlparse
+from html_extractor import extract_page_emails
+import deadline
+
+CRAWL_MAX_PAGES = 3
+CRAWL_TIME_BUDGET = 15  # Seconds per site
+
+# Anchor text / path keywords and how strongly they point at a contact address
+LINK_KEYWORDS = [
+    (('impressum', 'imprint'), 5),
+    (('kontakt', 'contact'), 4),
+    (('legal', 'rechtliches', 'anbieterkennzeichnung'), 3),
+    (('about', 'ueber-uns', 'über-uns', 'uber-uns', 'company', 'unternehmen'), 2),
+]
+# Second-level labels registered under a country TLD, as in co.uk, com.tr or gv.at
+SECOND_LEVEL_SUFFIXES = ('co', 'com', 'org', 'net', 'ac', 'gv', 'or')
+_LINK = re.compile(r'<a\b[^>]*?href\s*=\s*["\']([^"\'#]+)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r'<[^>]+>')
+
+def site_host(url):
+    """Host name without a leading www., used to keep the crawl on one site"""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+def registered_domain(url_or_host):
+    """Registered domain of a URL or host name ("https://shop.firma.co.uk/x" and
+    "mail.firma.co.uk" -> "firma.co.uk")"""
+    host = site_host(url_or_host) if '://' in url_or_host else url_or_host.lower()
+    parts = host.split(':')[0].split('.')
+    if len(parts) >= 3 and parts[-2] in SECOND_LEVEL_SUFFIXES:
+        return '.'.join(parts[-3:])
+    return '.'.join(parts[-2:])
+
+def rank_links(content, base_url, encoding=None):
+    """Returns same-site links ordered by how likely they lead to contact details"""
+    html = content.decode(encoding or 'utf-8', errors='replace')
+    site = site_host(base_url)
+    scores = {}
+    for href, anchor in _LINK.findall(html):
+        url = urljoin(base_url, href.strip())
+        if not url.startswith(('http://', 'https://')) or site_host(url) != site:
+            continue
+        text = _TAG.sub(' ', anchor).lower()
+        path = urlparse(url).path.lower()
+        score = 0
+        for keywords, weight in LINK_KEYWORDS:
+            if any(keyword in text for keyword in keywords):
+                score += weight
+            if any(keyword in path for keyword in keywords):
+                score += weight
+        if score and url.rstrip('/') != base_url.rstrip('/'):
+            scores[url] = max(score, scores.get(url, 0))
+    return sorted(scores, key=scores.get, reverse=True)
+
+def crawl_site(landing_page, fetch, accept, max_pages=CRAWL_MAX_PAGES, time_budget=CRAWL_TIME_BUDGET,
+               extract=extract_page_emails):
+    """Follows the best contact/impressum links of a landing page in parallel.
+
+    fetch(url) returns a response with .content/.encoding/.status_code;
+    accept(email, url) decides whether an address is a strong hit. Returns
+    (email, complete): the first strong hit within the page and time budget or
+    None, and whether every followed page was fetched with a success status
+    before the budget ran out.
+    """
+    links = rank_links(landing_page.content, landing_page.url, landing_page.encoding)[:max_pages]
+    if not links:
+        return None, True
+    print(f"Following site links: {', '.join(links)}")
+
+    def visit(url):
+        response = fetch(url)
+        if response.status_code >= 400:
+            return None, False
+        html_emails, text_emails = extract(response.content, response.encoding)
+        for email in html_emails + text_emails:
+            if accept(email, url):
+                return email, True
+        return None, True
+
+    complete = True
+    executor = ThreadPoolExecutor(max_workers=len(links))
+    futures = [executor.submit(deadline.bind(visit), url) for url in links]
+    try:
+        for future in as_completed(futures, timeout=time_budget):
+            try:
+                email, fetched = future.result()
+            except Exception:
+                complete = False  # Fetch error, throttled host or company deadline
+                continue
+            complete = complete and fetched
+            if email:
+                return email, complete
+    except TimeoutError:
+        print("Site crawl time budget exhausted")
+        complete = False
+    finally:
+        # Do not wait for slow pages once the budget is spent or a hit is found
+        executor.shutdown(wait=False, cancel_futures=True)
+    return None, complete
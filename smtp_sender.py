@@ -0,0 +1,85 @@
+import smtplib
+import ssl
+import threading
+from message_builder import MessageTemplate
+
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORT = 587  # Submission port with STARTTLS
+SMTP_TIMEOUT = 30
+
+class SmtpSender:
+    """Sends applications over SMTP submission with an app password.
+
+    One authenticated connection per account is kept open for the whole run
+    and reopened once if the server dropped it; send_email has the same
+    contract as the browser sender. use_tls=False and an empty password allow
+    a plain local stand-in such as aiosmtpd.
+    """
+    def __init__(self, account, password, host=SMTP_HOST, port=SMTP_PORT, use_tls=True, timeout=SMTP_TIMEOUT):
+        self.account = account
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._connection = None
+        self._template = None
+        self._template_key = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Opens and authenticates the connection; raises smtplib errors on failure"""
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.ehlo()
+            if self.use_tls:
+                connection.starttls(context=ssl.create_default_context())
+                connection.ehlo()
+            if self.password:
+                connection.login(self.account, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+        return connection
+
+    def template(self, subject, body, cv_path):
+        """The run's message template; the CV is encoded again only if the inputs change"""
+        key = (subject, body, cv_path)
+        if self._template is None or self._template_key != key:
+            self._template = MessageTemplate(self.account, subject, body, cv_path)
+            self._template_key = key
+        return self._template
+
+    def send_raw(self, recipient, data):
+        with self._lock:
+            if self._connection is None:
+                self.connect()
+            try:
+                self._connection.sendmail(self.account, [recipient], data)
+            except smtplib.SMTPServerDisconnected:
+                print("[*] SMTP connection dropped, reconnecting...")
+                self.connect()
+                self._connection.sendmail(self.account, [recipient], data)
+
+    def send_email(self, recipient, subject, body, cv_path, fields=None):
+        """fields fills {Company}-style placeholders in subject and body"""
+        try:
+            self.send_raw(recipient, self.template(subject, body, cv_path).render(recipient, fields))
+            print("[+] Email sent successfully!")
+            return True
+        except smtplib.SMTPRecipientsRefused as e:
+            print(f"[!] Recipient refused: {e.recipients}")
+            return False
+        except Exception as e:
+            print(f"[!] Error sending email: {str(e)}")
+            return False
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.quit()
+                except (smtplib.SMTPException, OSError):
+                    self._connection.close()
+                self._connection = None